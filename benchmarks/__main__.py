@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import typing as t
+from pathlib import Path
+
+from benchmarks import database, reaction_roles, rows, runner, utils
+
+BASELINE_PATH: t.Final = Path(__file__).parent / "baseline.json"
+SUITES: t.Final = (utils, rows, database, reaction_roles)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Run the benchmark suite and compare it to a baseline.",
+    )
+    parser.add_argument("-k", dest="match", default="", help="only run matching")
+    parser.add_argument("--output", type=Path, help="save results as JSON here")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="save these results as the new baseline",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="fail if there's no baseline to compare against",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="fractional slowdown that counts as a regression (default 0.25)",
+    )
+    args = parser.parse_args()
+
+    results = [
+        runner.measure(name, func)
+        for suite in SUITES
+        for name, func in suite.benchmarks()
+        if args.match.lower() in name.lower()
+    ]
+    baseline = runner.load(args.baseline) if args.baseline.exists() else {}
+    regressed = runner.report(results, baseline, args.threshold)
+
+    if args.output:
+        runner.save(args.output, results)
+
+    if args.save_baseline:
+        runner.save(args.baseline, results)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline.")
+        return 1 if args.check else 0
+
+    if regressed:
+        print(f"\n{len(regressed)} benchmark(s) regressed by over {args.threshold:.0%}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
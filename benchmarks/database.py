@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import tempfile
+import typing as t
+from pathlib import Path
+
+from benchmarks.runner import BenchmarksT
+from station_bot.db import Database
+
+STATIC_PATH: t.Final = Path(__file__).parent.parent / "data" / "static"
+BATCH: t.Final = 100
+
+
+def benchmarks() -> BenchmarksT:
+    loop = asyncio.new_event_loop()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(Path(tmp), STATIC_PATH, slow_query=0)
+        loop.run_until_complete(db.connect())
+        loop.run_until_complete(
+            db.execute(
+                "CREATE TABLE bench (b_id INTEGER PRIMARY KEY, b_name TEXT, "
+                "b_time NUMERIC DEFAULT CURRENT_TIMESTAMP)"
+            )
+        )
+        loop.run_until_complete(db.load_schema())
+        ids = itertools.count()
+
+        def execute() -> None:
+            loop.run_until_complete(
+                db.execute(
+                    "INSERT INTO bench (b_id, b_name) VALUES (?, ?)", next(ids), "row"
+                )
+            )
+
+        def executemany() -> None:
+            batch = [(next(ids), "row") for _ in range(BATCH)]
+            loop.run_until_complete(
+                db.executemany("INSERT INTO bench (b_id, b_name) VALUES (?, ?)", *batch)
+            )
+
+        def fetch_records() -> None:
+            loop.run_until_complete(
+                db.fetch_records("SELECT * FROM bench LIMIT ?", BATCH)
+            )
+
+        try:
+            yield "Database.execute", execute
+            yield f"Database.executemany ({BATCH} rows)", executemany
+            # The read pool only sees committed rows.
+            loop.run_until_complete(db.commit())
+            yield f"Database.fetch_records ({BATCH} rows)", fetch_records
+        finally:
+            loop.run_until_complete(db.close())
+            loop.close()
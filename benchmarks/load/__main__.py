@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import tempfile
+import time
+import typing as t
+from pathlib import Path
+
+from benchmarks.load import payloads
+from benchmarks.load.rest import StandInREST
+from station_bot.utils.stats import Histogram
+
+STATIC_PATH: t.Final = Path(__file__).parents[2] / "data" / "static"
+BOT_ID: t.Final = 10
+# Set before the bot is imported so a real .env can't point the run at
+# live channels or feeds. IDs are distinct so nothing collides in the
+# cache.
+ENVIRONMENT: t.Final = {
+    "TOKEN": "str:load-test",
+    "OWNER_IDS": "set:int:1",
+    "GUILD_ID": "int:100",
+    "LOG_CHANNEL_ID": "int:201",
+    "MEMBER_COUNT_CHANNEL_ID": "int:202",
+    "ROLE_ASSIGN_CHANNEL_ID": "int:203",
+    "RULES_MESSAGE_ID": "int:301",
+    "PASSENGER_ROLE_ID": "int:401",
+    "STREAMS_ROLE_ID": "int:402",
+    "FEED_CHANNEL_ID": "int:0",
+    "METRICS_PORT": "int:0",
+    "HTTP_DISK_CACHE": "bool:false",
+}
+QUIET_PERIOD: t.Final = 0.5
+MAX_DRAIN: t.Final = 30.0
+
+if t.TYPE_CHECKING:
+    from station_bot.bot import StationBot
+
+
+class Shard:
+    # Events only keep a reference to the shard they arrived on, so this
+    # is all the harness needs to stand in for one.
+    __slots__ = ("id",)
+
+    def __init__(self, shard_id: int = 0) -> None:
+        self.id = shard_id
+
+    async def request_guild_members(self, *args: t.Any, **kwargs: t.Any) -> None:
+        # The seeded guild already sends every member it has.
+        pass
+
+
+class Harness:
+    __slots__ = (
+        "bot",
+        "rest",
+        "shard",
+        "members",
+        "injected",
+        "commands",
+        "took",
+    )
+
+    def __init__(self, bot: StationBot, rest: StandInREST) -> None:
+        self.bot = bot
+        self.rest = rest
+        self.shard = Shard()
+        self.members: list[int] = []
+        self.injected: dict[str, int] = {}
+        # Interaction ID -> when it was injected, to time responses.
+        self.commands: dict[int, float] = {}
+        self.took = 0.0
+
+    def inject(self, name: str, payload: payloads.JSONObject) -> None:
+        self.injected[name] = self.injected.get(name, 0) + 1
+        self.bot.event_manager.consume_raw_event(
+            name, t.cast(t.Any, self.shard), payload
+        )
+
+    def seed(self, size: int) -> None:
+        from station_bot import Config
+
+        self.members = [payloads.snowflake() for _ in range(size)]
+        self.inject(
+            "GUILD_CREATE",
+            payloads.guild_create(
+                Config.GUILD_ID,
+                self.members[0] if self.members else BOT_ID,
+                [BOT_ID, *self.members],
+                {
+                    Config.PASSENGER_ROLE_ID: "Passenger",
+                    Config.STREAMS_ROLE_ID: "Streams",
+                },
+                {
+                    Config.LOG_CHANNEL_ID: "log",
+                    Config.MEMBER_COUNT_CHANNEL_ID: "members",
+                    Config.ROLE_ASSIGN_CHANNEL_ID: "roles",
+                },
+            ),
+        )
+
+    def join(self) -> None:
+        from station_bot import Config
+
+        self.members.append(user_id := payloads.snowflake())
+        self.inject("GUILD_MEMBER_ADD", payloads.member_add(Config.GUILD_ID, user_id))
+
+    def leave(self) -> None:
+        from station_bot import Config
+
+        if self.members:
+            user_id = self.members.pop(random.randrange(len(self.members)))
+            self.inject(
+                "GUILD_MEMBER_REMOVE", payloads.member_remove(Config.GUILD_ID, user_id)
+            )
+
+    def react(self, add: bool) -> None:
+        from station_bot import Config
+
+        if not self.members:
+            return
+
+        build = payloads.reaction_add if add else payloads.reaction_remove
+        self.inject(
+            "MESSAGE_REACTION_ADD" if add else "MESSAGE_REACTION_REMOVE",
+            build(
+                Config.GUILD_ID,
+                Config.ROLE_ASSIGN_CHANNEL_ID,
+                Config.RULES_MESSAGE_ID,
+                random.choice(self.members),
+            ),
+        )
+
+    def command(self) -> None:
+        from station_bot import Config
+
+        if not self.members:
+            return
+
+        interaction_id = payloads.snowflake()
+        self.commands[interaction_id] = time.perf_counter()
+        self.inject(
+            "INTERACTION_CREATE",
+            payloads.slash_command(
+                interaction_id,
+                BOT_ID,
+                Config.GUILD_ID,
+                Config.ROLE_ASSIGN_CHANNEL_ID,
+                random.choice(self.members),
+                "notify",
+                {"type": "streams"},
+            ),
+        )
+
+    async def drive(
+        self, rates: t.Mapping[t.Callable[[], None], float], duration: float
+    ) -> None:
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(self._pace(func, rate, duration) for func, rate in rates.items())
+        )
+        self.took = time.perf_counter() - start
+
+    @staticmethod
+    async def _pace(func: t.Callable[[], None], rate: float, duration: float) -> None:
+        if rate <= 0:
+            return
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        for i in range(int(rate * duration)):
+            # Sleeping even when behind schedule lets the bot's own
+            # tasks run between injections.
+            await asyncio.sleep(max(start + i / rate - loop.time(), 0))
+            func()
+
+    async def drain(self) -> None:
+        # Work is finished once the role queue is empty and the bot has
+        # stopped calling the REST API.
+        deadline = time.perf_counter() + MAX_DRAIN
+
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+            quiet = time.perf_counter() - self.rest.recorder.last > QUIET_PERIOD
+
+            if quiet and not self.bot.d.roles.depth:
+                return
+
+    def report(self) -> None:
+        from station_bot.metrics import metrics
+
+        recorder = self.rest.recorder
+        events = sum(n for name, n in self.injected.items() if name != "GUILD_CREATE")
+        print(f"Injected {events:,} events in {self.took:,.2f}s")
+
+        for name, n in sorted(self.injected.items()):
+            print(f"  {name:<28}{n:>8,}")
+
+        print(f"\nThroughput: {events / self.took:,.1f} events per second")
+        print(f"Event loop lag: {metrics.loop_lag.summary()} ms")
+
+        print("\nListener latency (ms):")
+
+        for plugin, histogram in sorted(metrics.listeners.items()):
+            print(
+                f"  {plugin:<12}{histogram.count:>8,} calls  {histogram.summary()}"
+                f"  max {histogram.max * 1_000:,.1f}"
+            )
+
+        responses = Histogram()
+
+        for call in recorder.calls:
+            if call.route == "POST /interactions/{id}/{token}/callback":
+                interaction_id = int(call.path.split("/")[2])
+
+                if (sent := self.commands.pop(interaction_id, None)) is not None:
+                    responses.observe(call.at - sent)
+
+        if responses.count:
+            print(f"\nCommand response time: {responses.summary()} ms")
+
+        if self.commands:
+            print(f"{len(self.commands):,} commands got no response")
+
+        print(
+            f"\nREST calls: {len(recorder.calls):,} "
+            f"({len(recorder.calls) / max(events, 1):,.3f} per event)"
+        )
+
+        for route, n in recorder.routes.most_common():
+            print(f"  {route:<56}{n:>8,}")
+
+        roles = self.bot.d.roles
+        print(
+            f"\nRole changes: {roles.dispatched:,} sent, {roles.saved:,} saved, "
+            f"{roles.failed:,} failed"
+        )
+
+
+async def run(args: argparse.Namespace) -> None:
+    import hikari
+
+    from station_bot.bot import create_bot
+
+    rest = StandInREST(BOT_ID)
+    await rest.start()
+
+    bot = create_bot(rest_url=rest.url, banner=None)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bot.d._dynamic = Path(tmp)
+        bot.d._static = STATIC_PATH
+        t.cast(hikari.impl.RESTClientImpl, bot.rest).start()
+        await bot.dispatch(hikari.StartingEvent(app=bot))
+
+        harness = Harness(bot, rest)
+        harness.seed(args.members)
+        await harness.drain()
+        # Only the injected load is measured.
+        rest.recorder.calls.clear()
+        rest.recorder.routes.clear()
+
+        await harness.drive(
+            {
+                harness.join: args.joins,
+                harness.leave: args.leaves,
+                lambda: harness.react(True): args.reactions,
+                lambda: harness.react(False): args.unreactions,
+                harness.command: args.commands,
+            },
+            args.duration,
+        )
+        await harness.drain()
+        harness.report()
+
+        await bot.dispatch(hikari.StoppingEvent(app=bot))
+        await bot.rest.close()
+
+    await rest.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load",
+        description=(
+            "Drive gateway events and slash commands into the bot, with "
+            "its plugins loaded, against a local stand-in for the REST API."
+        ),
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--members", type=int, default=1_000, help="guild size")
+    parser.add_argument("--joins", type=float, default=50.0, help="per second")
+    parser.add_argument("--leaves", type=float, default=10.0, help="per second")
+    parser.add_argument("--reactions", type=float, default=100.0, help="per second")
+    parser.add_argument("--unreactions", type=float, default=50.0, help="per second")
+    parser.add_argument("--commands", type=float, default=20.0, help="per second")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show bot logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+    os.environ.update(ENVIRONMENT)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
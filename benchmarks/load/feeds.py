@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import email.utils
+import logging
+import sys
+import tempfile
+import time
+import typing as t
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import aiohttp
+from aiohttp import web
+
+STATIC_PATH: t.Final = Path(__file__).parents[2] / "data" / "static"
+
+if t.TYPE_CHECKING:
+    from station_bot.feeds import FeedPoller
+
+
+def rss(name: str, entries: t.Sequence[int]) -> str:
+    items = "".join(
+        f"<item><guid>{name}-{i}</guid><title>{escape(name)} entry {i}</title>"
+        f"<link>https://example.com/{name}/{i}</link></item>"
+        for i in reversed(entries)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<rss version="2.0"><channel><title>{escape(name)}</title>'
+        f"<link>https://example.com/{name}</link>{items}</channel></rss>"
+    )
+
+
+def atom(name: str, entries: t.Sequence[int]) -> str:
+    items = "".join(
+        f"<entry><id>urn:{name}:{i}</id><title>{escape(name)} entry {i}</title>"
+        f'<link href="https://example.com/{name}/{i}"/>'
+        "<updated>2022-01-01T00:00:00Z</updated></entry>"
+        for i in reversed(entries)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f"<title>{escape(name)}</title><id>urn:{name}</id>"
+        f"<updated>2022-01-01T00:00:00Z</updated>{items}</feed>"
+    )
+
+
+class Feed:
+    __slots__ = (
+        "name",
+        "format",
+        "entries",
+        "window",
+        "version",
+        "modified",
+        "failures",
+    )
+
+    def __init__(self, name: str, format: str, entries: int) -> None:
+        self.name = name
+        self.format = format
+        self.entries = list(range(entries))
+        # Like most real feeds, only the latest entries are listed, so
+        # publishing pushes the oldest ones out.
+        self.window = entries
+        self.version = 0
+        self.modified = time.time()
+        # Requests left to answer with a server error.
+        self.failures = 0
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.name}-{self.version}"'
+
+    @property
+    def body(self) -> str:
+        listed = self.entries[-self.window :]
+        return (rss if self.format == "rss" else atom)(self.name, listed)
+
+    def publish(self, n: int) -> None:
+        start = self.entries[-1] + 1 if self.entries else 0
+        self.entries.extend(range(start, start + n))
+        self.version += 1
+        self.modified = time.time()
+
+
+class StandInFeeds:
+    __slots__ = (
+        "feeds",
+        "requests",
+        "not_modified",
+        "failed",
+        "host",
+        "port",
+        "_runner",
+    )
+
+    def __init__(self, *, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.feeds: dict[str, Feed] = {}
+        self.requests = 0
+        self.not_modified = 0
+        self.failed = 0
+        self.host = host
+        self.port = port
+        self._runner: web.AppRunner | None = None
+
+    def url(self, name: str) -> str:
+        return f"http://{self.host}:{self.port}/feeds/{name}"
+
+    def add(self, name: str, format: str, entries: int) -> Feed:
+        feed = self.feeds[name] = Feed(name, format, entries)
+        return feed
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/feeds/{name}", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Port 0 picks a free port, so read back the one in use.
+        self.port = self._runner.addresses[0][1]
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+
+        if not (feed := self.feeds.get(request.match_info["name"])):
+            return web.Response(status=404)
+
+        if feed.failures:
+            feed.failures -= 1
+            self.failed += 1
+            return web.Response(status=503)
+
+        if request.headers.get("If-None-Match") == feed.etag:
+            self.not_modified += 1
+            return web.Response(status=304)
+
+        return web.Response(
+            text=feed.body,
+            content_type=(
+                "application/rss+xml"
+                if feed.format == "rss"
+                else "application/atom+xml"
+            ),
+            headers={
+                "ETag": feed.etag,
+                "Last-Modified": email.utils.formatdate(feed.modified, usegmt=True),
+            },
+        )
+
+
+class Round:
+    __slots__ = ("name", "expected", "announced", "not_modified", "failed", "took")
+
+    def __init__(self, name: str, expected: int) -> None:
+        self.name = name
+        self.expected = expected
+        self.announced = 0
+        self.not_modified = 0
+        self.failed = 0
+        self.took = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.announced == self.expected
+
+
+async def poll(
+    poller: FeedPoller, server: StandInFeeds, name: str, expected: int
+) -> Round:
+    result = Round(name, expected)
+    not_modified, failed = server.not_modified, server.failed
+    result.announced = len(await poller.poll(map(server.url, server.feeds)))
+    result.not_modified = server.not_modified - not_modified
+    result.failed = server.failed - failed
+    result.took = poller.took
+    return result
+
+
+async def run(args: argparse.Namespace) -> tuple[list[Round], int]:
+    from station_bot.db import Database
+    from station_bot.feeds import FeedPoller
+
+    server = StandInFeeds()
+    await server.start()
+
+    for i in range(args.feeds):
+        feed = server.add(f"feed{i}", "rss" if i % 2 else "atom", args.entries)
+        feed.failures = int(i < args.failing)
+
+    rounds = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(Path(tmp), STATIC_PATH)
+        await db.connect()
+
+        async with aiohttp.ClientSession() as session:
+
+            def poller() -> FeedPoller:
+                return FeedPoller(
+                    db, session, concurrency=args.concurrency, timeout=args.timeout
+                )
+
+            current = poller()
+            # A feed's existing entries are never announced, even when
+            # its first poll fails.
+            rounds.append(await poll(current, server, "First poll", 0))
+            rounds.append(await poll(current, server, "Retry failed feeds", 0))
+            rounds.append(await poll(current, server, "Unchanged", 0))
+
+            for feed in server.feeds.values():
+                feed.publish(args.new)
+
+            expected = args.feeds * args.new
+            rounds.append(await poll(current, server, "New entries", expected))
+
+            # A restarted poller picks its validators and seen entries
+            # back up from the database.
+            current = poller()
+            rounds.append(await poll(current, server, "After restart", 0))
+
+            for feed in server.feeds.values():
+                feed.publish(args.new)
+
+            rounds.append(await poll(current, server, "New after restart", expected))
+
+        # Entries that have dropped out of a feed are pruned, so only
+        # the listed ones are still stored.
+        stored = await db.try_fetch_field("SELECT COUNT(*) FROM feed_entries")
+        await db.close()
+
+    await server.close()
+    return rounds, t.cast(int, stored)
+
+
+def report(rounds: list[Round], stored: int, expected: int) -> None:
+    print(
+        f"{'Round':<24}{'Announced':>10}{'Expected':>10}{'304s':>8}"
+        f"{'Failed':>8}{'Took':>12}"
+    )
+
+    for r in rounds:
+        print(
+            f"{r.name:<24}{r.announced:>10,}{r.expected:>10,}{r.not_modified:>8,}"
+            f"{r.failed:>8,}{r.took * 1_000:>9,.1f} ms" + ("" if r.ok else "  MISMATCH")
+        )
+
+    print(
+        f"\nStored entries: {stored:,} (expected {expected:,})"
+        + ("" if stored == expected else "  MISMATCH")
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load.feeds",
+        description=(
+            "Poll fixture RSS and Atom feeds served by a local stand-in, "
+            "and check which entries would be announced."
+        ),
+    )
+    parser.add_argument("--feeds", type=int, default=50, help="number of feeds")
+    parser.add_argument("--entries", type=int, default=20, help="entries per feed")
+    parser.add_argument("--new", type=int, default=2, help="entries published")
+    parser.add_argument(
+        "--failing", type=int, default=5, help="feeds whose first poll fails"
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=20.0, help="seconds")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+    rounds, stored = asyncio.run(run(args))
+    expected = args.feeds * args.entries
+    report(rounds, stored, expected)
+
+    if not all(r.ok for r in rounds) or stored != expected:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
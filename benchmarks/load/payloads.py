@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import datetime as dt
+import itertools
+import typing as t
+
+JSONObject = dict[str, t.Any]
+
+# Snowflakes only need to be unique and increasing here.
+_ids = itertools.count(1_000_000_000_000_000)
+
+
+def snowflake() -> int:
+    return next(_ids)
+
+
+def now() -> str:
+    return dt.datetime.now(dt.timezone.utc).isoformat()
+
+
+def user(user_id: int, *, bot: bool = False) -> JSONObject:
+    return {
+        "id": str(user_id),
+        "username": f"user{user_id % 100_000}",
+        "discriminator": "0001",
+        "avatar": None,
+        "bot": bot,
+    }
+
+
+def member(guild_id: int, user_id: int, role_ids: t.Iterable[int] = ()) -> JSONObject:
+    return {
+        "guild_id": str(guild_id),
+        "user": user(user_id),
+        "nick": None,
+        "avatar": None,
+        "roles": [str(r) for r in role_ids],
+        "joined_at": now(),
+        "premium_since": None,
+        "deaf": False,
+        "mute": False,
+        "pending": False,
+        "communication_disabled_until": None,
+    }
+
+
+def role(role_id: int, name: str) -> JSONObject:
+    return {
+        "id": str(role_id),
+        "name": name,
+        "color": 0,
+        "hoist": False,
+        "icon": None,
+        "unicode_emoji": None,
+        "position": 1,
+        "permissions": "0",
+        "managed": False,
+        "mentionable": True,
+    }
+
+
+def channel(guild_id: int, channel_id: int, name: str) -> JSONObject:
+    return {
+        "id": str(channel_id),
+        "type": 0,
+        "guild_id": str(guild_id),
+        "name": name,
+        "position": 0,
+        "permission_overwrites": [],
+        "nsfw": False,
+        "parent_id": None,
+        "topic": None,
+        "last_message_id": None,
+        "rate_limit_per_user": 0,
+    }
+
+
+def guild_create(
+    guild_id: int,
+    owner_id: int,
+    member_ids: t.Iterable[int],
+    role_ids: t.Mapping[int, str],
+    channel_ids: t.Mapping[int, str],
+) -> JSONObject:
+    members = [member(guild_id, user_id) for user_id in member_ids]
+    return {
+        "id": str(guild_id),
+        "name": "Load test",
+        "icon": None,
+        "splash": None,
+        "discovery_splash": None,
+        "owner_id": str(owner_id),
+        "afk_channel_id": None,
+        "afk_timeout": 300,
+        "verification_level": 0,
+        "default_message_notifications": 0,
+        "explicit_content_filter": 0,
+        "roles": [role(guild_id, "@everyone")]
+        + [role(r, name) for r, name in role_ids.items()],
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+        "mfa_level": 0,
+        "application_id": None,
+        "system_channel_id": None,
+        "system_channel_flags": 0,
+        "rules_channel_id": None,
+        "joined_at": now(),
+        "large": False,
+        "unavailable": False,
+        "member_count": len(members),
+        "voice_states": [],
+        "members": members,
+        "channels": [channel(guild_id, c, name) for c, name in channel_ids.items()],
+        "threads": [],
+        "presences": [],
+        "max_video_channel_users": 25,
+        "vanity_url_code": None,
+        "description": None,
+        "banner": None,
+        "premium_tier": 0,
+        "premium_subscription_count": 0,
+        "preferred_locale": "en-GB",
+        "public_updates_channel_id": None,
+        "nsfw_level": 0,
+        "premium_progress_bar_enabled": False,
+        "guild_scheduled_events": [],
+    }
+
+
+def member_add(guild_id: int, user_id: int) -> JSONObject:
+    return member(guild_id, user_id)
+
+
+def member_remove(guild_id: int, user_id: int) -> JSONObject:
+    return {"guild_id": str(guild_id), "user": user(user_id)}
+
+
+def reaction_add(
+    guild_id: int, channel_id: int, message_id: int, user_id: int
+) -> JSONObject:
+    return {
+        "user_id": str(user_id),
+        "channel_id": str(channel_id),
+        "message_id": str(message_id),
+        "guild_id": str(guild_id),
+        "member": member(guild_id, user_id),
+        "emoji": {"id": None, "name": "\N{WHITE HEAVY CHECK MARK}"},
+    }
+
+
+def reaction_remove(
+    guild_id: int, channel_id: int, message_id: int, user_id: int
+) -> JSONObject:
+    return {
+        "user_id": str(user_id),
+        "channel_id": str(channel_id),
+        "message_id": str(message_id),
+        "guild_id": str(guild_id),
+        "emoji": {"id": None, "name": "\N{WHITE HEAVY CHECK MARK}"},
+    }
+
+
+def slash_command(
+    interaction_id: int,
+    application_id: int,
+    guild_id: int,
+    channel_id: int,
+    user_id: int,
+    name: str,
+    options: t.Mapping[str, str],
+) -> JSONObject:
+    return {
+        "id": str(interaction_id),
+        "application_id": str(application_id),
+        "type": 2,
+        "data": {
+            "id": str(snowflake()),
+            "name": name,
+            "type": 1,
+            "options": [{"name": k, "type": 3, "value": v} for k, v in options.items()],
+        },
+        "guild_id": str(guild_id),
+        "channel_id": str(channel_id),
+        "member": {**member(guild_id, user_id), "permissions": "0"},
+        "token": f"token{interaction_id}",
+        "version": 1,
+        "locale": "en-GB",
+        "guild_locale": "en-GB",
+    }
+
+
+def message(channel_id: int, author_id: int, content: str) -> JSONObject:
+    return {
+        "id": str(snowflake()),
+        "channel_id": str(channel_id),
+        "author": user(author_id, bot=True),
+        "content": content,
+        "timestamp": now(),
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+        "flags": 0,
+    }
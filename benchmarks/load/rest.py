@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import collections
+import json
+import re
+import time
+import typing as t
+
+from aiohttp import web
+
+from benchmarks.load import payloads
+
+API_PREFIX: t.Final = "/api/v10"
+ID_PATTERN: t.Final = re.compile(r"/\d+")
+# Interaction and webhook tokens are route parameters too.
+TOKEN_PATTERN: t.Final = re.compile(r"/token\d+")
+
+
+class Call:
+    __slots__ = ("method", "path", "route", "at", "body")
+
+    def __init__(self, method: str, path: str, body: t.Any) -> None:
+        self.method = method
+        self.path = path
+        self.route = f"{method} " + TOKEN_PATTERN.sub(
+            "/{token}", ID_PATTERN.sub("/{id}", path)
+        )
+        self.at = time.perf_counter()
+        self.body = body
+
+
+class Recorder:
+    __slots__ = ("calls", "routes")
+
+    def __init__(self) -> None:
+        self.calls: list[Call] = []
+        self.routes: collections.Counter[str] = collections.Counter()
+
+    def record(self, call: Call) -> None:
+        self.calls.append(call)
+        self.routes[call.route] += 1
+
+    @property
+    def last(self) -> float:
+        return self.calls[-1].at if self.calls else 0.0
+
+
+class StandInREST:
+    __slots__ = ("recorder", "bot_id", "host", "port", "_runner")
+
+    def __init__(self, bot_id: int, *, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.recorder = Recorder()
+        self.bot_id = bot_id
+        self.host = host
+        self.port = port
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}{API_PREFIX}"
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_route("*", API_PREFIX + "/{path:.*}", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Port 0 picks a free port, so read back the one in use.
+        self.port = self._runner.addresses[0][1]
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        path = "/" + request.match_info["path"]
+        body = await request.read()
+
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            # Multipart uploads, like log files.
+            data = None
+
+        self.recorder.record(Call(request.method, path, data))
+        return self.respond(request.method, path, data)
+
+    def respond(self, method: str, path: str, data: t.Any) -> web.Response:
+        parts = path.strip("/").split("/")
+
+        # Only the routes the plugins use are modelled. Anything else
+        # gets an empty success, which is enough for calls whose result
+        # is ignored.
+        if method == "POST" and parts[0] == "channels" and parts[-1] == "messages":
+            content = (data or {}).get("content") or ""
+            return web.json_response(
+                payloads.message(int(parts[1]), self.bot_id, content)
+            )
+
+        if method == "PATCH" and parts[0] == "channels" and len(parts) == 2:
+            return web.json_response(
+                payloads.channel(0, int(parts[1]), (data or {}).get("name", ""))
+            )
+
+        # Interaction responses are fetched back before they're deleted.
+        if (
+            method in ("GET", "PATCH")
+            and parts[0] == "webhooks"
+            and "messages" in parts
+        ):
+            content = (data or {}).get("content") or ""
+            return web.json_response(payloads.message(0, self.bot_id, content))
+
+        if method == "GET" and parts[0] == "guilds" and parts[-1] == "members":
+            return web.json_response([])
+
+        if method == "GET" and parts == ["users", "@me"]:
+            return web.json_response(payloads.user(self.bot_id, bot=True))
+
+        return web.Response(status=204)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import functools
+import typing as t
+
+from benchmarks.runner import BenchmarksT
+
+EMOJI: t.Final = "\N{WHITE HEAVY CHECK MARK}"
+
+
+def benchmarks() -> BenchmarksT:
+    from station_bot.reaction_roles import ANY_EMOJI, ReactionRoles
+
+    # Lookups only touch the index, so no database is needed. Each kind
+    # of lookup should cost the same however many messages there are.
+    for size in (10, 1_000):
+        rr = ReactionRoles(t.cast(t.Any, None))
+
+        for message_id in range(size):
+            rr._index(1, message_id, EMOJI, 2)
+            rr._index(1, message_id, "123456789", 3)
+
+        rr._index(1, size, ANY_EMOJI, 4)
+
+        yield f"Reaction role miss ({size:,})", functools.partial(
+            rr.lookup, size + 1, None, EMOJI
+        )
+        yield f"Reaction role hit ({size:,})", functools.partial(
+            rr.lookup, 0, None, EMOJI
+        )
+        yield f"Reaction role any emoji ({size:,})", functools.partial(
+            rr.lookup, size, 987654321, "custom"
+        )
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import datetime as dt
+import functools
+import re
+import sqlite3
+import typing as t
+
+from benchmarks.runner import BenchmarksT
+from station_bot.db import RowFactory
+
+SMALL_BATCH: t.Final = 100
+ROWS: t.Final = 10_000
+COLUMNS: t.Final = {"err_time": "NUMERIC"}
+STRFTIME_PATTERN: t.Final = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+
+
+# The row type the database used before RowFactory, kept here to
+# compare against.
+class RowData(dict[str, t.Any]):
+    def __repr__(self) -> str:
+        return "RowData(" + ", ".join(f"{k}={v!r}" for k, v in self.items()) + ")"
+
+    def __getattr__(self, key: str) -> t.Any:
+        return self[key]
+
+    def __setitem__(self, key: str, value: t.Any) -> None:
+        raise ValueError("row data cannot be modified")
+
+    def __setattr__(self, key: str, value: t.Any) -> None:
+        raise ValueError("row data cannot be modified")
+
+    def __delitem__(self, key: str) -> None:
+        raise ValueError("row data cannot be modified")
+
+    def __delattr__(self, key: str) -> None:
+        raise ValueError("row data cannot be modified")
+
+    @classmethod
+    def from_selection(cls, cur: sqlite3.Cursor, row: tuple[t.Any, ...]) -> RowData:
+        def _resolve(field: int | float | str) -> t.Any:
+            if isinstance(field, (int, float)) or not STRFTIME_PATTERN.match(field):
+                return field
+
+            return dt.datetime.strptime(field, "%Y-%m-%d %H:%M:%S")
+
+        return cls((col[0], _resolve(row[i])) for i, col in enumerate(cur.description))
+
+
+def build() -> sqlite3.Connection:
+    cxn = sqlite3.connect(":memory:")
+    cxn.execute(
+        "CREATE TABLE errors ("
+        "err_id TEXT PRIMARY KEY, "
+        "err_time NUMERIC DEFAULT CURRENT_TIMESTAMP, "
+        "err_cmd TEXT, "
+        "err_text TEXT)"
+    )
+    cxn.executemany(
+        "INSERT INTO errors (err_id, err_cmd, err_text) VALUES (?, ?, ?)",
+        (
+            (f"{i:032x}", "notify", "Traceback (most recent call last):\n" * 5)
+            for i in range(ROWS)
+        ),
+    )
+    return cxn
+
+
+def fetch(
+    cxn: sqlite3.Connection, factory: t.Any, query: str = "SELECT * FROM errors"
+) -> list[t.Any]:
+    cxn.row_factory = factory
+    return cxn.execute(query).fetchall()
+
+
+def benchmarks() -> BenchmarksT:
+    cxn = build()
+
+    for size in (SMALL_BATCH, ROWS):
+        query = f"SELECT * FROM errors LIMIT {size}"
+
+        for name, factory in (
+            ("RowData.from_selection", RowData.from_selection),
+            ("RowFactory", RowFactory(COLUMNS)),
+        ):
+            yield f"{name} ({size:,} rows)", functools.partial(
+                fetch, cxn, factory, query
+            )
+
+    cxn.close()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import platform
+import timeit
+import typing as t
+from pathlib import Path
+
+REPEAT: t.Final = 5
+
+BenchmarksT = t.Iterator[tuple[str, t.Callable[[], object]]]
+
+
+class Result:
+    __slots__ = ("name", "seconds", "number")
+
+    def __init__(self, name: str, seconds: float, number: int) -> None:
+        self.name = name
+        # Best time per call across the repeats, which is the least
+        # affected by whatever else the machine was doing.
+        self.seconds = seconds
+        self.number = number
+
+
+def measure(name: str, func: t.Callable[[], object]) -> Result:
+    timer = timeit.Timer(func)
+    # Calls are batched so each repeat runs for at least 0.2 seconds.
+    number, _ = timer.autorange()
+    best = min(timer.repeat(REPEAT, number)) / number
+    return Result(name, best, number)
+
+
+def save(path: Path, results: t.Iterable[Result]) -> None:
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {
+            r.name: {"seconds": r.seconds, "number": r.number} for r in results
+        },
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+
+def load(path: Path) -> dict[str, float]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {name: r["seconds"] for name, r in data["results"].items()}
+
+
+def report(
+    results: t.Iterable[Result], baseline: t.Mapping[str, float], threshold: float
+) -> list[str]:
+    regressed = []
+    print(f"{'Benchmark':<40}{'Per call':>14}{'Baseline':>14}{'Change':>10}")
+
+    for r in results:
+        line = f"{r.name:<40}{_format(r.seconds):>14}"
+
+        if (base := baseline.get(r.name)) is not None:
+            change = r.seconds / base - 1
+            line += f"{_format(base):>14}{change:>+10.1%}"
+
+            if change > threshold:
+                regressed.append(r.name)
+                line += "  REGRESSED"
+
+        print(line)
+
+    return regressed
+
+
+def _format(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e3), ("µs", 1e6)):
+        if seconds * scale >= 1:
+            return f"{seconds * scale:,.2f} {unit}"
+
+    return f"{seconds * 1e9:,.0f} ns"
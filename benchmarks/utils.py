@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import datetime as dt
+import os
+
+from benchmarks.runner import BenchmarksT
+
+# Placeholders for the keys Config requires, so it can be built without
+# a real .env. Anything already set is left alone.
+REQUIRED_KEYS = (
+    ("TOKEN", "str:benchmark"),
+    ("OWNER_IDS", "set:int:1"),
+    ("LOG_CHANNEL_ID", "int:1"),
+)
+
+
+def benchmarks() -> BenchmarksT:
+    for key, value in REQUIRED_KEYS:
+        os.environ.setdefault(key, value)
+
+    from station_bot.config import Config
+    from station_bot.utils import chron, helpers, string
+
+    Config.load()
+    yield "Config attribute", lambda: Config.PREFIX
+    yield "Config item", lambda: Config["STREAMS_ROLE_ID"]
+    yield "Config build", Config.build
+
+    delta = dt.timedelta(days=3, hours=4, minutes=5, seconds=6, microseconds=7_000)
+    yield "chron.short_delta", lambda: chron.short_delta(delta, ms=True)
+    yield "chron.long_delta", lambda: chron.long_delta(delta, ms=True)
+
+    numbers = (1, 2, 3, 11, 12, 13, 21, 101, 1_000)
+    yield "string.ordinal (9 numbers)", lambda: [string.ordinal(n) for n in numbers]
+    items = ["trains", "trams", "buses", "ferries"]
+    yield "string.list_of", lambda: string.list_of(items)
+
+    yield "helpers.generate_id", helpers.generate_id
@@ -1,6 +0,0 @@
-CREATE TABLE IF NOT EXISTS errors (
-  err_id TEXT PRIMARY KEY,
-  err_time NUMERIC DEFAULT CURRENT_TIMESTAMP,
-  err_cmd TEXT,
-  err_text TEXT
-)
\ No newline at end of file
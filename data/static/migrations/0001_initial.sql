@@ -0,0 +1,12 @@
+CREATE TABLE IF NOT EXISTS errors (
+  err_id TEXT PRIMARY KEY,
+  err_time NUMERIC DEFAULT CURRENT_TIMESTAMP,
+  err_cmd TEXT,
+  err_text TEXT
+);
+
+CREATE TABLE IF NOT EXISTS member_counts (
+  mc_guild_id INTEGER PRIMARY KEY,
+  mc_count INTEGER,
+  mc_time NUMERIC DEFAULT CURRENT_TIMESTAMP
+)
\ No newline at end of file
@@ -0,0 +1,13 @@
+CREATE TABLE error_groups (
+  eg_hash TEXT PRIMARY KEY,
+  eg_type TEXT,
+  eg_count INTEGER DEFAULT 1,
+  eg_first NUMERIC DEFAULT CURRENT_TIMESTAMP,
+  eg_last NUMERIC DEFAULT CURRENT_TIMESTAMP,
+  eg_data BLOB
+);
+
+ALTER TABLE errors ADD COLUMN err_hash TEXT REFERENCES error_groups (eg_hash);
+ALTER TABLE errors ADD COLUMN err_data BLOB;
+
+CREATE INDEX errors_hash_time ON errors (err_hash, err_time DESC, err_id DESC);
@@ -0,0 +1,3 @@
+DROP INDEX errors_hash_time;
+
+CREATE INDEX errors_hash_id ON errors (err_hash, err_id DESC);
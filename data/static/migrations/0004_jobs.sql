@@ -0,0 +1,8 @@
+CREATE TABLE jobs (
+  job_id TEXT PRIMARY KEY,
+  job_kind TEXT,
+  job_due NUMERIC NOT NULL,
+  job_data TEXT
+);
+
+CREATE INDEX jobs_due ON jobs (job_due);
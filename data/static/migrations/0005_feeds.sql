@@ -0,0 +1,13 @@
+CREATE TABLE feed_state (
+  fs_url TEXT PRIMARY KEY,
+  fs_etag TEXT,
+  fs_modified TEXT,
+  fs_checked NUMERIC DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE feed_entries (
+  fe_url TEXT NOT NULL,
+  fe_guid TEXT NOT NULL,
+  fe_seen NUMERIC DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (fe_url, fe_guid)
+) WITHOUT ROWID;
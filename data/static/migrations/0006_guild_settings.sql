@@ -0,0 +1,22 @@
+CREATE TABLE guild_settings (
+  gs_guild_id INTEGER PRIMARY KEY,
+  gs_log_channel_id INTEGER NOT NULL DEFAULT 0,
+  gs_member_count_channel_id INTEGER NOT NULL DEFAULT 0,
+  gs_role_assign_channel_id INTEGER NOT NULL DEFAULT 0,
+  gs_rules_message_id INTEGER NOT NULL DEFAULT 0,
+  gs_passenger_role_id INTEGER NOT NULL DEFAULT 0,
+  gs_streams_role_id INTEGER NOT NULL DEFAULT 0,
+  gs_feed_channel_id INTEGER NOT NULL DEFAULT 0,
+  gs_revision INTEGER NOT NULL
+);
+
+CREATE INDEX guild_settings_revision ON guild_settings (gs_revision);
+
+CREATE TABLE shards (
+  sh_id INTEGER PRIMARY KEY,
+  sh_count INTEGER NOT NULL,
+  sh_pid INTEGER,
+  sh_latency REAL,
+  sh_guilds INTEGER,
+  sh_seen NUMERIC DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,19 @@
+CREATE TABLE reaction_roles (
+  rr_message_id INTEGER NOT NULL,
+  rr_emoji TEXT NOT NULL,
+  rr_guild_id INTEGER NOT NULL,
+  rr_channel_id INTEGER NOT NULL DEFAULT 0,
+  rr_role_id INTEGER NOT NULL,
+  PRIMARY KEY (rr_message_id, rr_emoji)
+) WITHOUT ROWID;
+
+CREATE INDEX reaction_roles_guild ON reaction_roles (rr_guild_id, rr_message_id);
+
+INSERT INTO reaction_roles (rr_message_id, rr_emoji, rr_guild_id, rr_role_id)
+SELECT gs_rules_message_id, '*', gs_guild_id, gs_passenger_role_id
+FROM guild_settings
+WHERE gs_rules_message_id != 0 AND gs_passenger_role_id != 0;
+
+ALTER TABLE guild_settings DROP COLUMN gs_rules_message_id;
+
+ALTER TABLE guild_settings DROP COLUMN gs_passenger_role_id;
@@ -0,0 +1,4 @@
+CREATE TABLE imports (
+  im_name TEXT PRIMARY KEY,
+  im_time NUMERIC DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
@@ -0,0 +1,32 @@
+-- name: insert_error write
+INSERT INTO errors (err_id, err_cmd, err_hash, err_data)
+VALUES (?, ?, ?, ?);
+
+-- name: record_error_group write
+INSERT INTO error_groups (eg_hash, eg_type, eg_data)
+VALUES (?, ?, ?)
+ON CONFLICT (eg_hash) DO UPDATE
+SET eg_count = eg_count + 1, eg_last = CURRENT_TIMESTAMP;
+
+-- name: error_by_prefix record
+SELECT err_id, err_time, err_cmd, err_text, err_data,
+  eg_hash, eg_type, eg_count, eg_first, eg_last, eg_data
+FROM errors LEFT JOIN error_groups ON eg_hash = err_hash
+WHERE err_id >= ? AND err_id < ?
+ORDER BY err_id DESC
+LIMIT 1;
+
+-- name: prunable_errors column
+SELECT err_id FROM (
+  SELECT err_id, err_data, ROW_NUMBER() OVER (
+    PARTITION BY err_hash ORDER BY err_id DESC
+  ) AS err_rank
+  FROM errors
+  WHERE err_hash IS NOT NULL
+)
+WHERE err_rank > ? AND err_data IS NOT NULL
+LIMIT ?;
+
+-- name: prune_error_sample many
+UPDATE errors SET err_data = NULL
+WHERE err_id = ?;
@@ -0,0 +1,19 @@
+-- name: feed_state record
+SELECT fs_etag, fs_modified FROM feed_state
+WHERE fs_url = ?;
+
+-- name: save_feed_state write
+INSERT OR REPLACE INTO feed_state (fs_url, fs_etag, fs_modified)
+VALUES (?, ?, ?);
+
+-- name: seen_feed_entries column
+SELECT fe_guid FROM feed_entries
+WHERE fe_url = ?;
+
+-- name: mark_feed_entries many
+INSERT OR IGNORE INTO feed_entries (fe_url, fe_guid)
+VALUES (?, ?);
+
+-- name: prune_feed_entries write
+DELETE FROM feed_entries
+WHERE fe_url = ? AND fe_guid NOT IN (SELECT value FROM json_each(?));
@@ -0,0 +1,7 @@
+-- name: imported field
+SELECT im_time FROM imports
+WHERE im_name = ?;
+
+-- name: mark_imported execute
+INSERT OR IGNORE INTO imports (im_name)
+VALUES (?);
@@ -0,0 +1,14 @@
+-- name: save_job write
+INSERT OR REPLACE INTO jobs (job_id, job_kind, job_due, job_data)
+VALUES (?, ?, ?, ?);
+
+-- name: delete_job write
+DELETE FROM jobs WHERE job_id = ?;
+
+-- name: job_due field
+SELECT job_due FROM jobs WHERE job_id = ?;
+
+-- name: pending_jobs records
+SELECT job_id, job_kind, job_due, job_data FROM jobs
+WHERE job_kind IS NOT NULL
+ORDER BY job_due;
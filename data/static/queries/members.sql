@@ -0,0 +1,7 @@
+-- name: member_count record
+SELECT mc_count, mc_time FROM member_counts
+WHERE mc_guild_id = ?;
+
+-- name: save_member_count write
+INSERT OR REPLACE INTO member_counts (mc_guild_id, mc_count)
+VALUES (?, ?);
@@ -0,0 +1,14 @@
+-- name: guild_reaction_roles records
+SELECT rr_message_id, rr_emoji, rr_channel_id, rr_role_id FROM reaction_roles
+WHERE rr_guild_id = ?
+ORDER BY rr_message_id, rr_emoji;
+
+-- name: save_reaction_role write
+INSERT OR REPLACE INTO reaction_roles (
+  rr_message_id, rr_emoji, rr_guild_id, rr_channel_id, rr_role_id
+)
+VALUES (?, ?, ?, ?, ?);
+
+-- name: delete_reaction_role write
+DELETE FROM reaction_roles
+WHERE rr_message_id = ? AND rr_emoji = ?;
@@ -0,0 +1,23 @@
+-- name: guild_settings record
+SELECT gs_guild_id, gs_log_channel_id, gs_member_count_channel_id,
+  gs_role_assign_channel_id, gs_streams_role_id, gs_feed_channel_id
+FROM guild_settings
+WHERE gs_guild_id = ?;
+
+-- name: save_guild_settings write
+INSERT OR REPLACE INTO guild_settings (
+  gs_guild_id, gs_log_channel_id, gs_member_count_channel_id,
+  gs_role_assign_channel_id, gs_streams_role_id, gs_feed_channel_id,
+  gs_revision
+)
+VALUES (
+  ?, ?, ?, ?, ?, ?,
+  (SELECT COALESCE(MAX(gs_revision), 0) + 1 FROM guild_settings)
+);
+
+-- name: settings_revision field
+SELECT COALESCE(MAX(gs_revision), 0) FROM guild_settings;
+
+-- name: changed_guild_settings records
+SELECT gs_guild_id, gs_revision FROM guild_settings
+WHERE gs_revision > ?;
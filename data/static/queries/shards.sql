@@ -0,0 +1,8 @@
+-- name: save_shard write
+INSERT OR REPLACE INTO shards (sh_id, sh_count, sh_pid, sh_latency, sh_guilds)
+VALUES (?, ?, ?, ?, ?);
+
+-- name: shard_health records
+SELECT sh_id, sh_pid, sh_latency, sh_guilds, sh_seen FROM shards
+WHERE sh_id < ? AND sh_count = ?
+ORDER BY sh_id;
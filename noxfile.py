@@ -10,6 +10,7 @@ PROJECT_NAME: t.Final = Path(__file__).parent.stem.lower()
 
 CHECK_PATHS: t.Final = (
     str(PROJECT_DIR / PROJECT_NAME),
+    str(PROJECT_DIR / "benchmarks"),
     str(PROJECT_DIR / "noxfile.py"),
 )
 
@@ -90,6 +91,16 @@ def security(session: nox.Session) -> None:
     session.run("bandit", "-qr", CHECK_PATHS[0], "-s", "B101")
 
 
+@nox.session(reuse_venv=True)
+def benchmarks(session: nox.Session) -> None:
+    session.install("-r", "requirements/base.txt")
+    # A fresh checkout has no baseline (it's machine-specific, so it
+    # isn't committed); the first run records one to compare against.
+    exists = (PROJECT_DIR / "benchmarks" / "baseline.json").exists()
+    mode = "--check" if exists else "--save-baseline"
+    session.run("python", "-m", "benchmarks", mode, *session.posargs)
+
+
 @nox.session(reuse_venv=True)
 def dependencies(session: nox.Session) -> None:
     session.install(*fetch_installs("Dependencies"))
@@ -1,11 +1,27 @@
-__all__ = ("Config", "Database")
+__all__ = (
+    "Config",
+    "Database",
+    "ErrorStore",
+    "LogSink",
+    "ReactionRoles",
+    "RoleQueue",
+    "SettingsStore",
+)
 
 import logging
 import typing as t
 from pathlib import Path
 
+# Imported first so the startup timeline begins before anything else
+# is loaded.
+from . import startup
 from .config import Config
 from .db import Database
+from .errors import ErrorStore
+from .logsink import LogSink
+from .reaction_roles import ReactionRoles
+from .roles import RoleQueue
+from .settings import SettingsStore
 
 __productname__ = "Station Bot"
 __version__ = "0.1.0.dev0"
@@ -18,5 +34,4 @@ __ci__ = "https://github.com/AveraqeDev/station-bot/actions"
 
 ROOT_DIR: t.Final = Path(__file__).parent
 
-logging.getLogger("apscheduler.executors.default").setLevel(logging.WARNING)
 logging.getLogger("py.warnings").setLevel(logging.ERROR)
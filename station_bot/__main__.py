@@ -1,3 +1,9 @@
+from station_bot.startup import timeline
+
+# Only the bot itself times its imports; the hook is removed once it's
+# ready, which other entry points never reach.
+timeline.imports.install()
+
 from station_bot import bot
 
 if __name__ == "__main__":
@@ -1,118 +1,106 @@
+import importlib
 import logging
 import os
-import traceback
+import sys
+import typing as t
 from pathlib import Path
 
 import hikari
 import lightbulb
-from aiohttp import ClientSession
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
-from hikari.events.base_events import FailedEventT
-from pytz import utc
 
 import station_bot
-from station_bot import Config, Database
-from station_bot.utils import helpers
+from station_bot import Config
+from station_bot.cache import resolve_cache_settings
+from station_bot.config import ConfigError
+from station_bot.intents import PREFIX_INTENTS, resolve_intents
+from station_bot.metrics import metrics
+from station_bot.scheduler import Scheduler
+from station_bot.startup import timeline
 
 log = logging.getLogger(__name__)
 
-bot = lightbulb.BotApp(
-    token=Config.TOKEN,
-    prefix=Config.PREFIX,
-    owner_ids=Config.OWNER_IDS,
-    case_insensitive_prefix_commands=True,
-    help_slash_command=True,
-    default_enabled_guilds=(Config.GUILD_ID,),
-    intents=hikari.Intents.ALL,
-)
-bot.d._dynamic = Path("./data/dynamic")
-bot.d._static = bot.d._dynamic.parent / "static"
-
-bot.d.scheduler = AsyncIOScheduler()
-bot.d.scheduler.configure(timezone=utc)
-
-bot.load_extensions_from("./station_bot/extensions")
-
-
-@bot.listen(hikari.StartingEvent)
-async def on_starting(event: hikari.StartingEvent) -> None:
-    bot.d.scheduler.start()
-    bot.d.session = ClientSession(trust_env=True)
-    log.info("AIOHTTP session started.")
-
-    bot.d.db = Database(bot.d._dynamic, bot.d._static)
-    await bot.d.db.connect()
-    bot.d.scheduler.add_job(bot.d.db.commit, CronTrigger(second=0))
-
-
-@bot.listen(hikari.StartedEvent)
-async def on_started(event: hikari.StartedEvent) -> None:
-    await bot.rest.create_message(
-        Config.LOG_CHANNEL_ID,
-        (
-            f"{station_bot.__productname__} is now online! "
-            f"(Version {station_bot.__version__})"
-        ),
-    )
+EXTENSIONS_PATH: t.Final = Path(__file__).parent / "extensions"
 
+CallbackT = t.Callable[[t.Any], t.Coroutine[t.Any, t.Any, None]]
 
-@bot.listen(hikari.StoppingEvent)
-async def on_stopping(event: hikari.StoppingEvent) -> None:
-    await bot.d.db.close()
-    await bot.d.session.close()
-    log.info("AIOHTTP session closed.")
-    bot.d.scheduler.shutdown()
 
-    await bot.rest.create_message(
-        Config.LOG_CHANNEL_ID,
-        (
-            f"{station_bot.__productname__} is shutting down. "
-            f"(Version {station_bot.__version__})"
-        ),
-    )
+class StationBot(lightbulb.BotApp):
+    __slots__ = ("_owners", "_timed")
 
+    def __init__(self, *args: t.Any, **kwargs: t.Any) -> None:
+        # BotApp subscribes its own listeners while initialising.
+        self._owners: dict[CallbackT, str] = {}
+        self._timed: dict[tuple[type[hikari.Event], CallbackT], CallbackT] = {}
+        super().__init__(*args, **kwargs)
 
-@bot.listen(hikari.DMMessageCreateEvent)
-async def on_dm_message_create(event: hikari.DMMessageCreateEvent) -> None:
-    if event.message.author.is_bot:
-        return
+    def add_plugin(self, plugin: lightbulb.Plugin) -> None:
+        for listeners in plugin._listeners.values():
+            for listener in listeners:
+                self._owners[listener] = plugin.name
 
-    await event.message.respond("I cannot work in direct messages.")
+        super().add_plugin(plugin)
 
+    def subscribe(self, event_type: type[t.Any], callback: CallbackT) -> None:
+        owner = self._owners.get(callback) or callback.__module__.partition(".")[0]
+        timed = metrics.time_listener(owner, event_type, callback)
+        self._timed[(event_type, callback)] = timed
+        super().subscribe(event_type, timed)
 
-@bot.listen(hikari.ExceptionEvent)
-async def on_error(event: hikari.ExceptionEvent[FailedEventT]) -> None:
-    raise event.exception
+    def unsubscribe(self, event_type: type[t.Any], callback: CallbackT) -> None:
+        super().unsubscribe(
+            event_type, self._timed.pop((event_type, callback), callback)
+        )
 
 
-@bot.listen(lightbulb.CommandErrorEvent)
-async def on_command_error(event: lightbulb.CommandErrorEvent) -> None:
-    exc = getattr(event.exception, "__cause__", event.exception)
+def create_bot(**kwargs: t.Any) -> StationBot:
+    timeline.mark("Imported")
+    names = [
+        f"station_bot.extensions.{path.stem}"
+        for path in sorted(EXTENSIONS_PATH.glob("[!_]*.py"))
+    ]
+
+    # Extensions are imported before the bot exists so the intents can
+    # be worked out from their listeners; the gateway intents can't be
+    # changed once the bot is created.
+    for name in names:
+        with timeline.phase(f"Imported extension {name.rpartition('.')[2]}"):
+            importlib.import_module(name)
+
+    extensions = [sys.modules[name] for name in names]
+    intents = resolve_intents(extensions, Config.INTENTS)
+    cache_settings = resolve_cache_settings(
+        extensions,
+        Config.CACHE_COMPONENTS,
+        max_messages=Config.CACHE_MAX_MESSAGES,
+        max_dm_channel_ids=Config.CACHE_MAX_DM_CHANNELS,
+    )
 
-    if isinstance(exc, lightbulb.NotOwner):
-        await event.context.respond("You need to be an owner to do that.")
-        return
+    with timeline.phase("Bot created"):
+        bot = StationBot(
+            token=Config.TOKEN,
+            # Prefix commands can't be invoked without message intents.
+            prefix=Config.PREFIX if intents & PREFIX_INTENTS else None,
+            owner_ids=Config.OWNER_IDS,
+            case_insensitive_prefix_commands=True,
+            help_slash_command=True,
+            intents=intents,
+            cache_settings=cache_settings,
+            **kwargs,
+        )
+        bot.d._dynamic = Path("./data/dynamic")
+        bot.d._static = bot.d._dynamic.parent / "static"
 
-    # Add more errors when needed.
+        bot.d.scheduler = Scheduler()
 
-    try:
-        err_id = helpers.generate_id()
-        await bot.d.db.execute(
-            "INSERT INTO errors(err_id, err_cmd, err_text) VALUES (?, ?, ?)",
-            err_id,
-            event.context.invoked_with,
-            "".join(traceback.format_exception(event.exception)),
-        )
-        await event.context.respond(
-            "Something went wrong. An error report has been created "
-            f"(ID: {err_id[:7]})."
-        )
-        await bot.rest.create_message(
-            Config.LOG_CHANNEL_ID, f"Error report created (ID: {err_id[:7]})."
-        )
-    finally:
-        raise event.exception
+        metrics.install(bot)
+
+    # Loaded one at a time so each extension shows up in the timeline.
+    for name in names:
+        with timeline.phase(f"Loaded extension {name.rpartition('.')[2]}"):
+            bot.load_extensions(name)
+
+    bot.d.timeline = timeline
+    return bot
 
 
 def run() -> None:
@@ -121,9 +109,17 @@ def run() -> None:
 
         uvloop.install()
 
-    bot.run(
+    # Each process runs the shards in SHARD_IDS out of SHARD_COUNT, and
+    # with them the guilds those shards own. Without them, one process
+    # runs every shard.
+    if not all(0 <= i < Config.SHARD_COUNT for i in Config.SHARD_IDS):
+        raise ConfigError("SHARD_IDS must all be lower than SHARD_COUNT.")
+
+    create_bot().run(
         activity=hikari.Activity(
             name=f"/help • Version {station_bot.__version__}",
             type=hikari.ActivityType.WATCHING,
-        )
+        ),
+        shard_ids=Config.SHARD_IDS or None,
+        shard_count=Config.SHARD_COUNT or None,
     )
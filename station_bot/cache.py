@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import collections.abc
+import functools
+import itertools
+import logging
+import operator
+import sys
+import types
+import typing as t
+
+import hikari
+from hikari.api import CacheComponents
+from hikari.impl.config import CacheSettings
+
+from station_bot.config import ConfigError
+
+# Command contexts resolve guilds and channels from the cache,
+# permission checks need roles, and lightbulb needs the bot's own user.
+BASE_COMPONENTS: t.Final = (
+    CacheComponents.GUILDS
+    | CacheComponents.GUILD_CHANNELS
+    | CacheComponents.ROLES
+    | CacheComponents.ME
+)
+SAMPLE_SIZE: t.Final = 50
+
+log = logging.getLogger(__name__)
+
+
+def parse_components(text: str) -> CacheComponents:
+    try:
+        return functools.reduce(
+            operator.or_,
+            (CacheComponents[name.strip().upper()] for name in text.split("|")),
+            CacheComponents.NONE,
+        )
+    except KeyError as ex:
+        raise ConfigError(f"Unknown cache component {ex}") from None
+
+
+def resolve_cache_settings(
+    extensions: t.Iterable[types.ModuleType],
+    override: str = "",
+    *,
+    max_messages: int = 0,
+    max_dm_channel_ids: int = 0,
+) -> CacheSettings:
+    if override:
+        components = parse_components(override)
+    else:
+        components = BASE_COMPONENTS
+
+        for module in extensions:
+            # Extensions declare the components they read.
+            components |= getattr(module, "CACHE", CacheComponents.NONE)
+
+    if not max_messages:
+        components &= ~CacheComponents.MESSAGES
+
+    if not max_dm_channel_ids:
+        components &= ~CacheComponents.DM_CHANNEL_IDS
+
+    log.info(f"Caching {components}")
+
+    if dropped := CacheComponents.ALL & ~components:
+        log.info(f"Not caching {dropped}")
+
+    return CacheSettings(
+        components=components,
+        max_messages=max_messages,
+        max_dm_channel_ids=max_dm_channel_ids,
+    )
+
+
+def estimate_size(obj: t.Any, seen: set[int] | None = None) -> int:
+    # A rough deep sizeof. Objects shared between entries (like interned
+    # strings or the app) are only counted once per call.
+    if seen is None:
+        seen = set()
+
+    if id(obj) in seen or isinstance(obj, (type, types.ModuleType, hikari.RESTAware)):
+        return 0
+
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return size
+
+    if isinstance(obj, collections.abc.Mapping):
+        return size + sum(
+            estimate_size(k, seen) + estimate_size(v, seen) for k, v in obj.items()
+        )
+
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(i, seen) for i in obj)
+
+    for cls in type(obj).__mro__:
+        for slot in getattr(cls, "__slots__", ()):
+            size += estimate_size(getattr(obj, slot, None), seen)
+
+    if hasattr(obj, "__dict__"):
+        size += estimate_size(vars(obj), seen)
+
+    return size
+
+
+def _flatten(view: t.Mapping[t.Any, t.Any], nested: bool) -> t.Iterator[t.Any]:
+    if not nested:
+        return iter(view.values())
+
+    return itertools.chain.from_iterable(inner.values() for inner in view.values())
+
+
+def cache_report(cache: hikari.api.Cache) -> list[tuple[str, int, int]]:
+    # (name, view getter, whether the view is grouped by guild)
+    views: tuple[tuple[str, t.Callable[[], t.Any], bool], ...] = (
+        ("Guilds", cache.get_guilds_view, False),
+        ("Channels", cache.get_guild_channels_view, False),
+        ("Roles", cache.get_roles_view, False),
+        ("Members", cache.get_members_view, True),
+        ("Users", cache.get_users_view, False),
+        ("Presences", cache.get_presences_view, True),
+        ("Voice states", cache.get_voice_states_view, True),
+        ("Emojis", cache.get_emojis_view, False),
+        ("Invites", cache.get_invites_view, False),
+        ("Messages", cache.get_messages_view, False),
+    )
+    report = []
+
+    for name, getter, nested in views:
+        view = getter()
+        count = sum(len(v) for v in view.values()) if nested else len(view)
+
+        # Sizes are estimated from a sample so large caches stay cheap.
+        sample = list(itertools.islice(_flatten(view, nested), SAMPLE_SIZE))
+        size = sum(estimate_size(entry) for entry in sample)
+        report.append((name, count, size * count // len(sample) if sample else 0))
+
+    return report
@@ -1,3 +1,7 @@
+from __future__ import annotations
+
+import dataclasses
+import logging
 import os
 import typing as t
 from pathlib import Path
@@ -6,14 +10,73 @@ import dotenv
 
 dotenv.load_dotenv()
 
+log = logging.getLogger(__name__)
+
+TRUTHY_VALUES: t.Final = frozenset(("1", "true", "yes", "on"))
+
+
+class ConfigError(Exception):
+    pass
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ConfigSnapshot:
+    TOKEN: str
+    OWNER_IDS: frozenset[int]
+    LOG_CHANNEL_ID: int
+    # The home guild takes its settings from the keys with matching
+    # names (like FEED_CHANNEL_ID) until they're changed with /settings.
+    GUILD_ID: int = 0
+    MEMBER_COUNT_CHANNEL_ID: int = 0
+    ROLE_ASSIGN_CHANNEL_ID: int = 0
+    STREAMS_ROLE_ID: int = 0
+    # Imported as a reaction role for any emoji on this message in the
+    # home guild, unless it already has reaction roles.
+    RULES_MESSAGE_ID: int = 0
+    PASSENGER_ROLE_ID: int = 0
+    PREFIX: str = "-"
+    SHARD_IDS: frozenset[int] = frozenset()
+    SHARD_COUNT: int = 0
+    SHARD_HEARTBEAT_INTERVAL: float = 30.0
+    SETTINGS_SYNC_INTERVAL: float = 5.0
+    INTENTS: str = ""
+    CACHE_COMPONENTS: str = ""
+    CACHE_MAX_MESSAGES: int = 0
+    CACHE_MAX_DM_CHANNELS: int = 0
+    DB_READERS: int = 4
+    DB_WRITE_BEHIND: bool = False
+    DB_COMMIT_LATENCY: float = 0.05
+    DB_COMMIT_ROWS: int = 100
+    DB_SLOW_QUERY_MS: float = 250.0
+    DB_BUSY_TIMEOUT: float = 5.0
+    ERROR_SAMPLES: int = 5
+    LOG_FLUSH_INTERVAL: float = 5.0
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 0
+    MEMBER_COUNT_INTERVAL: float = 300.0
+    MEMBER_COUNT_SNAPSHOT_TTL: float = 900.0
+    HTTP_LIMIT: int = 100
+    HTTP_LIMIT_PER_HOST: int = 8
+    HTTP_DNS_TTL: int = 300
+    HTTP_CACHE_ENTRIES: int = 512
+    HTTP_CACHE_MB: float = 32.0
+    HTTP_DISK_CACHE: bool = False
+    FEED_URLS: str = ""
+    FEED_CHANNEL_ID: int = 0
+    FEED_INTERVAL: float = 300.0
+    FEED_CONCURRENCY: int = 8
+    FEED_TIMEOUT: float = 20.0
+
 
 class ConfigMeta(type):
+    _snapshot: ConfigSnapshot | None
+
     def resolve_value(cls, value: str) -> t.Any:
         _map: dict[str, t.Callable[[str], t.Any]] = {
             "str": str,
             "int": int,
             "float": float,
-            "bool": bool,
+            "bool": lambda x: x.strip().lower() in TRUTHY_VALUES,
             "set": lambda x: set([cls.resolve_value(e.strip()) for e in x.split(",")]),
             "file": lambda x: Path(x).read_text().strip("\n"),
         }
@@ -26,10 +89,80 @@ class ConfigMeta(type):
         except Exception:
             return cls.resolve_value(key)
 
+    def build(cls) -> ConfigSnapshot:
+        hints = t.get_type_hints(ConfigSnapshot)
+        values: dict[str, t.Any] = {}
+        missing: list[str] = []
+
+        for field in dataclasses.fields(ConfigSnapshot):
+            if field.name not in os.environ:
+                if field.default is dataclasses.MISSING:
+                    missing.append(field.name)
+                continue
+
+            try:
+                value = cls.resolve_key(os.environ[field.name])
+            except Exception as ex:
+                raise ConfigError(f"{field.name} could not be resolved: {ex}") from ex
+
+            if isinstance(value, set):
+                value = frozenset(value)
+
+            expected = t.get_origin(hints[field.name]) or hints[field.name]
+            if expected is float and isinstance(value, int):
+                value = float(value)
+
+            if not isinstance(value, expected):
+                raise ConfigError(
+                    f"{field.name} should be of type {expected.__name__}, "
+                    f"not {type(value).__name__}."
+                )
+
+            values[field.name] = value
+
+        if missing:
+            raise ConfigError(f"Missing config keys: {', '.join(missing)}.")
+
+        return ConfigSnapshot(**values)
+
+    def load(cls) -> ConfigSnapshot:
+        cls._bind(snapshot := cls.build())
+        log.info("Loaded config snapshot")
+        return snapshot
+
+    def reload(cls) -> list[str]:
+        dotenv.load_dotenv(override=True)
+        new = cls.build()
+        old = cls._snapshot
+        # Bound without yielding to the loop, so no coroutine sees a mix
+        # of old and new values.
+        cls._bind(new)
+        log.info("Reloaded config snapshot")
+
+        if old is None:
+            return [f.name for f in dataclasses.fields(new)]
+
+        return [
+            f.name
+            for f in dataclasses.fields(new)
+            if getattr(old, f.name) != getattr(new, f.name)
+        ]
+
+    def _bind(cls, snapshot: ConfigSnapshot) -> None:
+        # Fields are set as class attributes so Config.X is an ordinary
+        # lookup. __getattr__ is only reached before the first load.
+        for field in dataclasses.fields(snapshot):
+            setattr(cls, field.name, getattr(snapshot, field.name))
+
+        cls._snapshot = snapshot
+
     def __getattr__(cls, name: str) -> t.Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+
         try:
-            return cls.resolve_key(name)
-        except KeyError:
+            return getattr(cls._snapshot or cls.load(), name)
+        except AttributeError:
             raise AttributeError(f"{name} is not a key in config.") from None
 
     def __getitem__(cls, name: str) -> t.Any:
@@ -37,4 +170,4 @@ class ConfigMeta(type):
 
 
 class Config(metaclass=ConfigMeta):
-    pass
+    _snapshot = None
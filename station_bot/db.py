@@ -1,137 +1,626 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import datetime as dt
+import functools
+import itertools
 import logging
+import operator
 import os
 import re
+import sqlite3
+import time
 import typing as t
 from pathlib import Path
 
 import aiofiles
 import aiosqlite
 
-STRFTIME_PATTERN: t.Final = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+from station_bot.migrations import Migrator
+from station_bot.queries import LITERAL_PATTERN, QueryRegistry
+from station_bot.utils.stats import Histogram
+
+DEFAULT_CACHED_STATEMENTS: t.Final = 128
+NUMBER_PATTERN: t.Final = re.compile(r"\b\d+(?:\.\d+)?\b")
+# Times are stored in NUMERIC columns, as in the migrations.
+TIMESTAMP_TYPES: t.Final = frozenset(("NUMERIC", "TIMESTAMP", "DATETIME"))
 
 log = logging.getLogger(__name__)
 
-ValueT = int | float | dt.datetime | str | None
+ValueT = int | float | dt.datetime | str | bytes | None
+OpT = t.TypeVar("OpT")
+
+
+class QueryStats:
+    __slots__ = ("statement", "calls", "wait", "latency")
+
+    def __init__(self, statement: str) -> None:
+        self.statement = statement
+        self.calls = 0
+        self.wait = 0.0
+        self.latency = Histogram()
+
+    def observe(self, wait: float, took: float) -> None:
+        self.calls += 1
+        self.wait += wait
+        self.latency.observe(took)
+
+
+@functools.lru_cache(maxsize=1024)
+def normalise(command: str) -> str:
+    command = NUMBER_PATTERN.sub("?", LITERAL_PATTERN.sub("?", command))
+    return " ".join(command.split())
+
+
+def _exec_one(cxn: sqlite3.Connection, command: str, values: t.Any) -> sqlite3.Cursor:
+    return cxn.execute(command, values)
+
+
+def _exec_many(cxn: sqlite3.Connection, command: str, values: t.Any) -> sqlite3.Cursor:
+    return cxn.executemany(command, values)
 
 
-class RowData(dict[str, t.Any]):
+def _fetch_one(cxn: sqlite3.Connection, command: str, values: t.Any) -> t.Any:
+    return cxn.execute(command, values).fetchone()
+
+
+def _fetch_all(cxn: sqlite3.Connection, command: str, values: t.Any) -> list[t.Any]:
+    return cxn.execute(command, values).fetchall()
+
+
+class Row(tuple[t.Any, ...]):
+    __slots__ = ()
+
+    _fields: tuple[str, ...] = ()
+    _types: dict[tuple[str, ...], type[Row]] = {}
+
     def __repr__(self) -> str:
-        return "RowData(" + ", ".join(f"{k}={v!r}" for k, v in self.items()) + ")"
+        return (
+            "Row(" + ", ".join(f"{k}={v!r}" for k, v in zip(self._fields, self)) + ")"
+        )
 
     def __getattr__(self, key: str) -> t.Any:
-        return self[key]
+        # Only reached for names that aren't valid attributes, like
+        # "COUNT(*)".
+        try:
+            return self[self._fields.index(key)]
+        except ValueError:
+            raise AttributeError(f"row has no column {key!r}") from None
 
-    def __setitem__(self, key: str, value: t.Any) -> None:
-        raise ValueError("row data cannot be modified")
+    def _asdict(self) -> dict[str, t.Any]:
+        return dict(zip(self._fields, self))
 
-    def __setattr__(self, key: str, value: t.Any) -> None:
-        raise ValueError("row data cannot be modified")
+    @classmethod
+    def type_for(cls, fields: tuple[str, ...]) -> type[Row]:
+        if (row_type := cls._types.get(fields)) is not None:
+            return row_type
 
-    def __delitem__(self, key: str) -> None:
-        raise ValueError("row data cannot be modified")
+        ns: dict[str, t.Any] = {"__slots__": (), "_fields": fields}
 
-    def __delattr__(self, key: str) -> None:
-        raise ValueError("row data cannot be modified")
+        for i, name in enumerate(fields):
+            if name.isidentifier() and not name.startswith("_"):
+                ns.setdefault(name, property(operator.itemgetter(i)))
 
-    @classmethod
-    def from_selection(
-        cls, cur: aiosqlite.Cursor, row: aiosqlite.Row[t.Any]
-    ) -> RowData:
-        def _resolve(field: int | float | str) -> t.Any:
-            if isinstance(field, (int, float)) or not STRFTIME_PATTERN.match(field):
-                return field
+        row_type = cls._types[fields] = type("Row", (cls,), ns)
+        return row_type
 
-            return dt.datetime.strptime(field, "%Y-%m-%d %H:%M:%S")
 
-        return cls((col[0], _resolve(row[i])) for i, col in enumerate(cur.description))
+class RowDecoder:
+    __slots__ = ("row_type", "timestamps")
 
+    def __init__(self, fields: tuple[str, ...], timestamps: tuple[int, ...]) -> None:
+        self.row_type = Row.type_for(fields)
+        self.timestamps = timestamps
 
-class Database:
-    __slots__ = ("db_path", "sql_path", "calls", "cxn")
+    def __call__(self, row: tuple[t.Any, ...]) -> Row:
+        if not self.timestamps:
+            return tuple.__new__(self.row_type, row)
+
+        values = list(row)
+
+        for i in self.timestamps:
+            if (value := values[i]) is not None:
+                try:
+                    values[i] = dt.datetime.fromisoformat(value)
+                except (TypeError, ValueError):
+                    pass
+
+        return tuple.__new__(self.row_type, values)
 
-    def __init__(self, dynamic: Path, static: Path) -> None:
+
+class RowFactory:
+    __slots__ = ("columns", "decoders", "description", "decoder")
+
+    # One factory per connection, so the last description is only ever
+    # touched from that connection's worker thread.
+    def __init__(
+        self,
+        columns: t.Mapping[str, str] | None = None,
+        decoders: dict[tuple[str, ...], RowDecoder] | None = None,
+    ) -> None:
+        # Column name -> declared type. Column names are prefixed by
+        # table, so a name is the same column in whichever query it's
+        # selected by.
+        self.columns = columns if columns is not None else {}
+        # Column names -> decoder, shared between connections so each
+        # query's columns are only worked out once.
+        self.decoders = decoders if decoders is not None else {}
+        self.description: t.Any = None
+        self.decoder: RowDecoder | None = None
+
+    def __call__(self, cur: sqlite3.Cursor, row: tuple[t.Any, ...]) -> Row:
+        # Checking the description first saves building the key for
+        # every row of the same cursor.
+        if cur.description is not self.description or self.decoder is None:
+            self.description = cur.description
+            fields = tuple(c[0] for c in cur.description)
+
+            if (decoder := self.decoders.get(fields)) is None:
+                decoder = self.decoders[fields] = RowDecoder(
+                    fields,
+                    tuple(
+                        i
+                        for i, name in enumerate(fields)
+                        if self.columns.get(name) in TIMESTAMP_TYPES
+                    ),
+                )
+
+            self.decoder = decoder
+
+        return self.decoder(row)
+
+
+class Database:
+    __slots__ = (
+        "db_path",
+        "migrator",
+        "query_path",
+        "pool_size",
+        "calls",
+        "reads",
+        "fallbacks",
+        "busy",
+        "peak",
+        "cxn",
+        "pool",
+        "q",
+        "write_behind",
+        "commit_latency",
+        "commit_rows",
+        "writes",
+        "commits",
+        "_queue",
+        "_queued",
+        "_full",
+        "_flusher",
+        "_lock",
+        "_closing",
+        "tasks",
+        "stats",
+        "latency",
+        "wait_time",
+        "exec_time",
+        "slow_query",
+        "busy_timeout",
+        "columns",
+        "decoders",
+    )
+
+    def __init__(
+        self,
+        dynamic: Path,
+        static: Path,
+        *,
+        readers: int = 4,
+        write_behind: bool = False,
+        commit_latency: float = 0.05,
+        commit_rows: int = 100,
+        slow_query: float = 0.25,
+        busy_timeout: float = 5.0,
+    ) -> None:
         self.db_path = (dynamic / "database.sqlite3").resolve()
-        self.sql_path = (static / "build.sql").resolve()
+        self.migrator = Migrator((static / "migrations").resolve())
+        self.query_path = (static / "queries").resolve()
+        self.pool_size = readers
         self.calls = 0
+        self.reads = 0
+        self.fallbacks = 0
+        self.busy = 0
+        self.peak = 0
+        self.pool: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self.q = QueryRegistry(self)
+        self.write_behind = write_behind
+        self.commit_latency = commit_latency
+        self.commit_rows = commit_rows
+        self.writes = 0
+        self.commits = 0
+        self._queue: list[tuple[str, tuple[ValueT, ...], asyncio.Future[None]]] = []
+        self._queued = asyncio.Event()
+        self._full = asyncio.Event()
+        self._flusher: asyncio.Task[None] | None = None
+        # Held by anything that writes through the writer connection, so
+        # a batch's savepoints never interleave with other writes.
+        self._lock = asyncio.Lock()
+        self._closing = False
+        # Slow query reports, kept so they aren't collected mid-flight.
+        self.tasks: set[asyncio.Task[None]] = set()
+        self.stats: dict[str, QueryStats] = {}
+        self.latency = Histogram()
+        self.wait_time = 0.0
+        self.exec_time = 0.0
+        self.slow_query = slow_query
+        # Shard processes share the database, so a connection waits this
+        # long for another process's write lock before giving up.
+        self.busy_timeout = busy_timeout
+        # Shared by every connection's row factory, and filled in from
+        # the schema once it's migrated.
+        self.columns: dict[str, str] = {}
+        self.decoders: dict[tuple[str, ...], RowDecoder] = {}
 
     async def connect(self) -> None:
+        self.q.load(self.query_path)
+        # Leave room for every named query on top of ad hoc statements.
+        cached = DEFAULT_CACHED_STATEMENTS + len(self.q)
+
         os.makedirs(self.db_path.parent, exist_ok=True)
-        self.cxn = await aiosqlite.connect(self.db_path)
+        self.cxn = await aiosqlite.connect(
+            self.db_path, cached_statements=cached, timeout=self.busy_timeout
+        )
         log.info(f"Connected to database at {self.db_path}")
 
-        self.cxn.row_factory = t.cast(t.Any, RowData.from_selection)
+        self.cxn.row_factory = t.cast(t.Any, RowFactory(self.columns, self.decoders))
         await self.cxn.execute("pragma journal_mode = wal")
-        await self.executescript(self.sql_path)
-        log.info(f"Built database ({self.db_path.parts[-1]})")
+        await self.migrator.apply(self.cxn)
 
         await self.cxn.commit()
+        await self.load_schema()
+        await self.q.validate(self.cxn)
+
+        # WAL lets readers run alongside the writer, so reads get their
+        # own read-only connections (and worker threads).
+        for _ in range(self.pool_size):
+            cxn = await aiosqlite.connect(
+                f"{self.db_path.as_uri()}?mode=ro",
+                uri=True,
+                cached_statements=cached,
+                timeout=self.busy_timeout,
+            )
+            cxn.row_factory = t.cast(t.Any, RowFactory(self.columns, self.decoders))
+            self.pool.put_nowait(cxn)
+
+        log.info(f"Opened {self.pool_size} reader connections")
+
+        if self.write_behind:
+            self._flusher = asyncio.create_task(self._flush_loop())
+            log.info(
+                f"Write-behind enabled ({self.commit_latency * 1_000:,.0f} ms "
+                f"or {self.commit_rows:,} rows per commit)"
+            )
+
+    async def load_schema(self) -> None:
+        # Timestamps are decoded by declared type rather than by what
+        # the values look like, so text that happens to look like a
+        # time is left alone.
+        rows = await self.cxn.execute_fetchall(
+            "SELECT p.name, p.type FROM sqlite_master AS m, "
+            "pragma_table_info(m.name) AS p "
+            "WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'"
+        )
+        self.columns.clear()
+        self.columns.update((name, type.upper()) for name, type in rows)
+        # Decoders were worked out from the old columns.
+        self.decoders.clear()
 
     async def commit(self) -> None:
+        async with self._lock:
+            await self._commit()
+
+    async def _commit(self) -> None:
         await self.cxn.commit()
+        self.commits += 1
 
     async def close(self) -> None:
-        await self.cxn.commit()
+        # Cancelling the flusher could strand a batch it has already
+        # taken off the queue, so it's woken up to finish instead.
+        if self._flusher:
+            self._closing = True
+            self._queued.set()
+            self._full.set()
+            await self._flusher
+            self._flusher = None
+
+        await self.flush()
+        await self.commit()
+
+        # Slow query reports read their plans through the pool.
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+        for _ in range(self.pool_size):
+            await (await self.pool.get()).close()
+
         await self.cxn.close()
-        log.info("Closed database connection")
+        log.info("Closed database connections")
+
+    @contextlib.asynccontextmanager
+    async def reader(self) -> t.AsyncIterator[aiosqlite.Connection]:
+        if not self.pool_size:
+            yield self.cxn
+            return
+
+        # Reader connections only see committed data, so reads go
+        # through the writer while it holds uncommitted changes. Writes
+        # are committed before the lock is released, so a transaction
+        # held under it is a batch nobody is waiting on yet.
+        if self.cxn.in_transaction and not self._lock.locked():
+            self.fallbacks += 1
+            yield self.cxn
+            return
+
+        cxn = await self.pool.get()
+        self.reads += 1
+        self.busy += 1
+        self.peak = max(self.peak, self.busy)
+
+        try:
+            yield cxn
+        finally:
+            self.busy -= 1
+            self.pool.put_nowait(cxn)
 
     async def try_fetch_field(self, command: str, *values: ValueT) -> ValueT:
-        cur = await self.execute(command, *values)
-
-        if (row := await cur.fetchone()) is None:
-            return None
+        async with self.reader() as cxn:
+            row = await self._run(cxn, command, values, _fetch_one)
 
-        return t.cast(ValueT, row[0])
+        return None if row is None else t.cast(ValueT, row[0])
 
-    async def try_fetch_record(self, command: str, *values: ValueT) -> RowData | None:
-        cur = await self.execute(command, *values)
-        return t.cast(t.Optional[RowData], await cur.fetchone())
+    async def try_fetch_record(self, command: str, *values: ValueT) -> Row | None:
+        async with self.reader() as cxn:
+            return t.cast(
+                t.Optional[Row], await self._run(cxn, command, values, _fetch_one)
+            )
 
-    async def fetch_records(self, command: str, *values: ValueT) -> t.Iterable[RowData]:
-        cur = await self.execute(command, *values)
-        return t.cast(t.Iterable[RowData], await cur.fetchall())
+    async def fetch_records(self, command: str, *values: ValueT) -> list[Row]:
+        async with self.reader() as cxn:
+            return t.cast(list[Row], await self._run(cxn, command, values, _fetch_all))
 
     async def fetch_column(
         self, command: str, *values: ValueT, index: int = 0
     ) -> list[ValueT]:
-        cur = await self.execute(command, *values)
-
-        if not (rows := await cur.fetchall()):
-            return []
+        async with self.reader() as cxn:
+            rows = await self._run(cxn, command, values, _fetch_all)
 
         return [row[index] for row in rows]
 
+    async def iter_records(
+        self, command: str, *values: ValueT, chunk_size: int = 500
+    ) -> t.AsyncIterator[Row]:
+        async with self.reader() as cxn:
+            cur = await self._execute(cxn, command, values)
+
+            try:
+                while rows := await cur.fetchmany(chunk_size):
+                    for row in rows:
+                        yield t.cast(Row, row)
+            finally:
+                await cur.close()
+
+    def write(self, command: str, *values: ValueT) -> asyncio.Future[None]:
+        self.writes += 1
+
+        if not self.write_behind:
+            return asyncio.ensure_future(self._write_now(command, values))
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((command, self._convert(values), future))
+        self._queued.set()
+
+        if len(self._queue) >= self.commit_rows:
+            self._full.set()
+
+        return future
+
+    async def _write_now(self, command: str, values: tuple[ValueT, ...]) -> None:
+        async with self._lock:
+            await self._execute(self.cxn, command, values)
+            await self._commit()
+
+    async def _flush_loop(self) -> None:
+        while not self._closing:
+            await self._queued.wait()
+
+            # Let the batch fill for up to the latency budget, unless
+            # it's full.
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._full.wait(), self.commit_latency)
+
+            await self.flush()
+
+    async def flush(self) -> None:
+        self._queued.clear()
+        self._full.clear()
+
+        if not (batch := self._queue):
+            return
+
+        self._queue = []
+
+        async with self._lock:
+            await self._flush(batch)
+
+    async def _flush(
+        self, batch: list[tuple[str, tuple[ValueT, ...], asyncio.Future[None]]]
+    ) -> None:
+        failed: dict[asyncio.Future[None], Exception] = {}
+
+        try:
+            if not self.cxn.in_transaction:
+                await self.cxn.execute("BEGIN")
+
+            # Consecutive writes of the same statement share one
+            # executemany.
+            for command, group in itertools.groupby(batch, key=lambda w: w[0]):
+                writes = list(group)
+                await self.cxn.execute("SAVEPOINT write_behind")
+
+                try:
+                    await self._executemany(command, tuple(w[1] for w in writes))
+                except sqlite3.Error:
+                    # Retry one by one so only the offending writes
+                    # fail.
+                    await self.cxn.execute("ROLLBACK TO write_behind")
+
+                    for _, values, future in writes:
+                        try:
+                            await self.cxn.execute(command, values)
+                        except sqlite3.Error as ex:
+                            failed[future] = ex
+                finally:
+                    await self.cxn.execute("RELEASE write_behind")
+
+            await self._commit()
+        except Exception as ex:
+            log.exception(f"Failed to commit {len(batch):,} queued writes")
+
+            with contextlib.suppress(sqlite3.Error):
+                await self.cxn.rollback()
+
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(ex)
+
+            return
+
+        for *_, future in batch:
+            if future.done():
+                continue
+
+            if (error := failed.get(future)) is not None:
+                log.error(f"Queued write failed: {error}")
+                future.set_exception(error)
+            else:
+                future.set_result(None)
+
     async def execute(self, command: str, *values: ValueT) -> aiosqlite.Cursor:
+        # Ad hoc writes are committed straight away, so they never leave
+        # a transaction open that would push reads onto the writer.
+        async with self._lock:
+            cur = await self._execute(self.cxn, command, values)
+            await self._commit()
+
+        return cur
+
+    @staticmethod
+    def _convert(values: tuple[ValueT, ...]) -> tuple[ValueT, ...]:
         val_list = list(values)
 
         for i, v in enumerate(values):
             if isinstance(v, dt.datetime):
                 val_list[i] = v.strftime("%Y-%m-%d %H:%M:%S")
 
-        self.calls += 1
-        cur = await self.cxn.execute(command, tuple(values))
-        # fmt: off
-        log.info(
-            f"Executed query '{command}' ({cur.rowcount} rows modified)"
-            .replace("-1", "unknown")
-        )
-        # fmt: on
-        return cur
+        return tuple(val_list)
+
+    async def _execute(
+        self, cxn: aiosqlite.Connection, command: str, values: tuple[ValueT, ...]
+    ) -> aiosqlite.Cursor:
+        cur = await self._run(cxn, command, values, _exec_one)
+
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Executed query %r (%s rows modified)", command, cur.rowcount)
+
+        return aiosqlite.Cursor(cxn, cur)
 
     async def executemany(
         self, command: str, *values: tuple[ValueT, ...]
     ) -> aiosqlite.Cursor:
+        async with self._lock:
+            cur = await self._executemany(command, values)
+            await self._commit()
+
+        return cur
+
+    async def _executemany(
+        self, command: str, values: tuple[tuple[ValueT, ...], ...]
+    ) -> aiosqlite.Cursor:
+        rows = tuple(self._convert(v) for v in values)
+        cur = await self._run(self.cxn, command, rows, _exec_many)
+
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(
+                "Executed multiquery %r (%s rows modified)", command, cur.rowcount
+            )
+
+        return aiosqlite.Cursor(self.cxn, cur)
+
+    async def _run(
+        self,
+        cxn: aiosqlite.Connection,
+        command: str,
+        values: tuple[t.Any, ...],
+        op: t.Callable[[sqlite3.Connection, str, tuple[t.Any, ...]], OpT],
+    ) -> OpT:
+        if op is not _exec_many:
+            values = self._convert(values)
+
+        raw = cxn._conn
+        started = 0.0
+
+        def call() -> OpT:
+            nonlocal started
+            started = time.perf_counter()
+            return op(raw, command, values)
+
         self.calls += 1
-        cur = await self.cxn.executemany(command, tuple(values))
-        # fmt: off
-        log.info(
-            f"Executed multiquery '{command}' ({cur.rowcount} rows modified)"
-            .replace("-1", "unknown")
+        queued = time.perf_counter()
+
+        try:
+            # aiosqlite only reaches its worker thread through _execute,
+            # so the call is timestamped from inside the thread to split
+            # queueing from execution.
+            return t.cast(OpT, await t.cast(t.Any, cxn)._execute(call))
+        finally:
+            done = time.perf_counter()
+            wait = (started or done) - queued
+            took = done - (started or done)
+            self.wait_time += wait
+            self.exec_time += took
+            self.latency.observe(wait + took)
+
+            if (stats := self.stats.get(key := normalise(command))) is None:
+                stats = self.stats[key] = QueryStats(key)
+
+            stats.observe(wait, took)
+
+            if self.slow_query and took >= self.slow_query:
+                self._spawn(self._log_slow(command, values, took))
+
+    def _spawn(self, coro: t.Coroutine[t.Any, t.Any, None]) -> None:
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _log_slow(
+        self, command: str, values: tuple[t.Any, ...], took: float
+    ) -> None:
+        try:
+            async with self.reader() as cxn:
+                plan = await cxn.execute_fetchall(
+                    f"EXPLAIN QUERY PLAN {command}",
+                    values[0] if values and isinstance(values[0], tuple) else values,
+                )
+        except sqlite3.Error as ex:
+            plan_text = f"unavailable ({ex})"
+        else:
+            plan_text = "; ".join(str(row[3]) for row in plan)
+
+        log.warning(
+            "Slow query took %.1f ms: %r with %r (plan: %s)",
+            took * 1_000,
+            command,
+            values,
+            plan_text,
         )
-        # fmt: on
-        return cur
 
     async def executescript(self, path: Path | str) -> aiosqlite.Cursor:
         if not isinstance(path, Path):
@@ -139,7 +628,10 @@ class Database:
         path = path.resolve()
 
         async with aiofiles.open(path, encoding="utf-8") as f:
-            cur = await self.cxn.executescript(await f.read())
+            script = await f.read()
+
+        async with self._lock:
+            cur = await self.cxn.executescript(script)
             # fmt: off
             log.info(
                 f"Executed script query from {path} ({cur.rowcount} rows modified)"
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import traceback
+import typing as t
+import zlib
+from pathlib import Path
+
+from station_bot.utils import helpers
+
+if t.TYPE_CHECKING:
+    from station_bot.db import Database, Row
+
+COMPRESSION_LEVEL: t.Final = 9
+
+log = logging.getLogger(__name__)
+
+
+class ErrorReport:
+    __slots__ = ("row", "text", "sampled")
+
+    def __init__(self, row: Row, text: str, sampled: bool) -> None:
+        self.row = row
+        self.text = text
+        # Whether the text comes from the group because this report's
+        # own traceback has been pruned.
+        self.sampled = sampled
+
+
+class ErrorStore:
+    __slots__ = ("db", "samples", "batch_size", "pruned")
+
+    def __init__(
+        self, db: Database, *, samples: int = 5, batch_size: int = 500
+    ) -> None:
+        self.db = db
+        self.samples = samples
+        self.batch_size = batch_size
+        self.pruned = 0
+
+    @staticmethod
+    def fingerprint(exc: BaseException) -> tuple[str, str]:
+        # Messages and line contents are left out so reports from the
+        # same bug group together even when the values involved differ.
+        parts = []
+        tbe: traceback.TracebackException | None = (
+            traceback.TracebackException.from_exception(exc)
+        )
+
+        while tbe:
+            parts.append(f"{tbe.exc_type.__module__}.{tbe.exc_type.__qualname__}")
+            parts.extend(
+                f"{Path(frame.filename).name}:{frame.lineno}:{frame.name}"
+                for frame in tbe.stack
+            )
+            tbe = tbe.__cause__ or (
+                None if tbe.__suppress_context__ else tbe.__context__
+            )
+
+        digest = hashlib.blake2b("\n".join(parts).encode(), digest_size=8)
+        cause = exc.__cause__ or exc
+        return digest.hexdigest(), type(cause).__name__
+
+    @staticmethod
+    def compress(text: str) -> bytes:
+        return zlib.compress(text.encode(), COMPRESSION_LEVEL)
+
+    @staticmethod
+    def decompress(data: bytes) -> str:
+        return zlib.decompress(data).decode()
+
+    async def record(self, err_id: str, command: str, exc: BaseException) -> str:
+        err_hash, err_type = self.fingerprint(exc)
+        data = self.compress("".join(traceback.format_exception(exc)))
+
+        await self.db.q.record_error_group(err_hash, err_type, data)
+        await self.db.q.insert_error(err_id, command, err_hash, data)
+        return err_hash
+
+    async def fetch(self, search_id: str) -> ErrorReport | None:
+        # IDs sort lexically, so a prefix is the range between the
+        # prefix and the prefix followed by a character above the whole
+        # alphabet. Older reports used lowercase hex IDs, so those are
+        # tried second.
+        prefix = helpers.normalise_id(search_id)
+        row = await self.db.q.error_by_prefix(prefix, f"{prefix}~")
+
+        if not row and (legacy := search_id.strip().lower()) != prefix:
+            row = await self.db.q.error_by_prefix(legacy, f"{legacy}~")
+
+        if not row:
+            return None
+
+        if row.err_data is not None:
+            return ErrorReport(row, self.decompress(row.err_data), False)
+
+        if row.err_text is not None:
+            return ErrorReport(row, row.err_text, False)
+
+        if row.eg_data is not None:
+            return ErrorReport(row, self.decompress(row.eg_data), True)
+
+        return ErrorReport(row, "No traceback was stored for this report.", False)
+
+    async def prune(self) -> int:
+        # Samples are cleared in small batches, each committed on its
+        # own, so the write lock is never held for long.
+        pruned = 0
+
+        while err_ids := await self.db.q.prunable_errors(self.samples, self.batch_size):
+            await self.db.q.prune_error_sample(*((err_id,) for err_id in err_ids))
+            pruned += len(err_ids)
+
+            if len(err_ids) < self.batch_size:
+                break
+
+            await asyncio.sleep(0)
+
+        if pruned:
+            self.pruned += pruned
+            log.info(f"Pruned {pruned:,} old error samples")
+
+        return pruned
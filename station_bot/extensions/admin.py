@@ -1,12 +1,31 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import datetime as dt
+import gzip
+import json
 import logging
-from io import BytesIO
+import os
+import tempfile
+import typing as t
+from pathlib import Path
 
 import hikari
 import lightbulb
 
 import station_bot
+from station_bot import Config, Database
+from station_bot.cache import cache_report
+from station_bot.config import ConfigError
+from station_bot.startup import lazy_import
+
+EXPORT_CHUNK_SIZE: t.Final = 500
+# The smallest upload limit of any server, whatever its boost level.
+UPLOAD_LIMIT: t.Final = 8 * 1024**2
+PROFILE_LOCK: t.Final = asyncio.Lock()
+
+profiler = lazy_import("station_bot.profiler")
 
 log = logging.getLogger(__name__)
 
@@ -25,6 +44,24 @@ async def cmd_shutdown(ctx: lightbulb.SlashContext) -> None:
     await ctx.bot.close()
 
 
+@plugin.command
+@lightbulb.add_checks(lightbulb.owner_only)
+@lightbulb.command("reloadconfig", "Reload the bot configuration.", ephemeral=True)
+@lightbulb.implements(lightbulb.SlashCommand)
+async def cmd_reloadconfig(ctx: lightbulb.SlashContext) -> None:
+    try:
+        changed = Config.reload()
+    except ConfigError as ex:
+        await ctx.respond(f"The config was not reloaded: {ex}")
+        return
+
+    log.info(f"Config reloaded ({len(changed)} keys changed)")
+    await ctx.respond(
+        "Config reloaded. "
+        + (f"Changed keys: {', '.join(changed)}." if changed else "Nothing changed.")
+    )
+
+
 @plugin.command
 @lightbulb.add_checks(lightbulb.owner_only)
 @lightbulb.option("id", "The error reference ID.")
@@ -35,24 +72,211 @@ async def cmd_error(ctx: lightbulb.SlashContext) -> None:
         await ctx.respond("Your search should be at least 5 characters long.")
         return
 
-    row = await ctx.bot.d.db.try_fetch_record(
-        "SELECT * FROM errors "
-        "WHERE err_id LIKE ? || '%'"
-        "ORDER BY err_time DESC "
-        "LIMIT 1",
-        search_id,
-    )
+    report = await ctx.bot.d.errors.fetch(search_id)
 
-    if not row:
+    if not report:
         await ctx.respond("No errors matching that reference were found.")
         return
 
     message = await ctx.respond("error found. Standby...")
-    b = BytesIO(
-        f"Command: /{row.err_cmd}\nAt: {row.err_time}\n\n{row.err_text}".encode()
+    row = report.row
+    text = f"Command: /{row.err_cmd}\nAt: {row.err_time}\n"
+
+    if row.eg_hash:
+        text += (
+            f"Group: {row.eg_hash} ({row.eg_type}, seen {row.eg_count:,} times "
+            f"between {row.eg_first} and {row.eg_last})\n"
+        )
+
+    if report.sampled:
+        text += "This report's traceback was pruned; showing the group's sample.\n"
+
+    text += f"\n{report.text}"
+    await message.edit(
+        content=None, attachment=hikari.Bytes(text.encode(), f"err{row.err_id}.txt")
+    )
+
+
+@plugin.command
+@lightbulb.add_checks(lightbulb.owner_only)
+@lightbulb.command("dbstats", "View per-query database statistics.")
+@lightbulb.implements(lightbulb.SlashCommand)
+async def cmd_dbstats(ctx: lightbulb.SlashContext) -> None:
+    db: Database = ctx.bot.d.db
+    stats = sorted(db.stats.values(), key=lambda s: s.latency.total, reverse=True)
+    lines = [
+        f"{db.calls:,} calls, {db.wait_time:,.3f}s queued, "
+        f"{db.exec_time:,.3f}s executing ({db.latency.summary()} ms)",
+        "",
+    ]
+
+    for s in stats:
+        lines.append(
+            f"{s.calls:>8,} calls {s.latency.total:>9,.3f}s "
+            f"{s.wait / s.calls * 1_000:>7,.2f} ms queued  "
+            f"{s.latency.summary()} ms\n    {s.statement}"
+        )
+
+    text = "\n".join(lines)
+
+    if len(text) < 1_900:
+        await ctx.respond(f"```\n{text}\n```")
+        return
+
+    await ctx.respond(attachment=hikari.Bytes(text.encode(), "dbstats.txt"))
+
+
+@plugin.command
+@lightbulb.add_checks(lightbulb.owner_only)
+@lightbulb.option(
+    "memory", "Include a tracemalloc diff.", type=bool, required=False, default=False
+)
+@lightbulb.option(
+    "mode",
+    "Sample the stack, or trace every call (slower).",
+    choices=("sample", "deterministic"),
+    required=False,
+    default="sample",
+)
+@lightbulb.option(
+    "seconds", "How long to profile for.", type=int, min_value=1, max_value=120
+)
+@lightbulb.command("profile", "Profile the running bot.")
+@lightbulb.implements(lightbulb.SlashCommand)
+async def cmd_profile(ctx: lightbulb.SlashContext) -> None:
+    if PROFILE_LOCK.locked():
+        await ctx.respond("A profile is already running.")
+        return
+
+    async with PROFILE_LOCK:
+        message = await ctx.respond(
+            f"Profiling for {ctx.options.seconds} seconds. Standby..."
+        )
+        result = profiler.Profiler(
+            ctx.options.seconds, mode=ctx.options.mode, memory=ctx.options.memory
+        )
+        await result.run()
+
+    attachments = [hikari.Bytes(result.report().encode(), "profile.txt")]
+
+    if result.stacks:
+        attachments.append(
+            hikari.Bytes(result.collapsed().encode(), "profile.collapsed")
+        )
+
+    await message.edit(content=None, attachments=attachments)
+
+
+@plugin.command
+@lightbulb.add_checks(lightbulb.owner_only)
+@lightbulb.command("cachestats", "View cache entries and estimated sizes.")
+@lightbulb.implements(lightbulb.SlashCommand)
+async def cmd_cachestats(ctx: lightbulb.SlashContext) -> None:
+    report = cache_report(ctx.bot.cache)
+    total = sum(size for _, _, size in report)
+    lines = [f"{'Component':<14}{'Entries':>10}{'Est. size':>14}"]
+    lines.extend(
+        f"{name:<14}{count:>10,}{size / 1024:>11,.1f} KiB"
+        for name, count, size in report
+    )
+    lines.append(f"{'Total':<14}{'':>10}{total / 1024:>11,.1f} KiB")
+    lines.append(f"\nCaching {ctx.bot.cache.settings.components}")
+    await ctx.respond("```\n" + "\n".join(lines) + "\n```")
+
+
+def _to_json(value: t.Any) -> t.Any:
+    if isinstance(value, dt.datetime):
+        return value.isoformat(" ")
+
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+
+@plugin.command
+@lightbulb.add_checks(lightbulb.owner_only)
+@lightbulb.option("until", "Export rows before this date (YYYY-MM-DD).", required=False)
+@lightbulb.option("since", "Export rows from this date (YYYY-MM-DD).", required=False)
+@lightbulb.option("table", "The table to export.")
+@lightbulb.command("export", "Export a database table as gzipped NDJSON.")
+@lightbulb.implements(lightbulb.SlashCommand)
+async def cmd_export(ctx: lightbulb.SlashContext) -> None:
+    db = ctx.bot.d.db
+    tables = await db.fetch_column(
+        "SELECT name FROM sqlite_master "
+        "WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
     )
-    b.seek(0)
-    await message.edit(content=None, attachment=hikari.Bytes(b, f"err{row.err_id}.txt"))
+
+    if (table := ctx.options.table) not in tables:
+        await ctx.respond(f"Valid tables are: {', '.join(map(str, tables))}.")
+        return
+
+    try:
+        bounds = [
+            (op, dt.datetime.fromisoformat(value))
+            for op, value in ((">=", ctx.options.since), ("<", ctx.options.until))
+            if value
+        ]
+    except ValueError:
+        await ctx.respond("Dates should be in the format YYYY-MM-DD.")
+        return
+
+    # The table name has already been checked against sqlite_master.
+    command = f'SELECT * FROM "{table}"'  # nosec: B608
+    time_columns = [
+        c
+        for c in await db.fetch_column(f'PRAGMA table_info("{table}")', index=1)
+        if str(c).endswith("_time")
+    ]
+
+    if bounds and not time_columns:
+        await ctx.respond(f"The {table} table has no time column to filter by.")
+        return
+
+    if bounds:
+        command += " WHERE " + " AND ".join(
+            f'"{time_columns[0]}" {op} ?' for op, _ in bounds
+        )
+
+    message = await ctx.respond(f"Exporting {table}. Standby...")
+    rows = 0
+    # Rows are streamed into a compressed file on disk, so memory use
+    # doesn't depend on the size of the table.
+    fd, name = tempfile.mkstemp(dir=ctx.bot.d._dynamic, suffix=".ndjson.gz")
+    path = Path(name)
+
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            chunk: list[bytes] = []
+
+            async for row in db.iter_records(command, *(v for _, v in bounds)):
+                chunk.append(json.dumps(row._asdict(), default=_to_json).encode())
+                rows += 1
+
+                if len(chunk) >= EXPORT_CHUNK_SIZE:
+                    await asyncio.to_thread(f.write, b"\n".join(chunk) + b"\n")
+                    chunk.clear()
+
+            if chunk:
+                await asyncio.to_thread(f.write, b"\n".join(chunk) + b"\n")
+
+        if (size := path.stat().st_size) > UPLOAD_LIMIT:
+            await message.edit(
+                content=(
+                    f"The export of {table} is {size / 1024**2:,.1f} MiB, which "
+                    f"is over the {UPLOAD_LIMIT / 1024**2:,.0f} MiB upload limit. "
+                    "Try a narrower date range."
+                )
+            )
+            return
+
+        await message.edit(
+            content=f"Exported {rows:,} rows from {table}.",
+            attachment=hikari.File(path, f"{table}.ndjson.gz"),
+        )
+    finally:
+        path.unlink(missing_ok=True)
 
 
 def load(bot: lightbulb.BotApp) -> None:
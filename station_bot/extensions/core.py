@@ -0,0 +1,207 @@
+import asyncio
+import collections
+import logging
+import math
+import os
+
+import hikari
+import lightbulb
+from hikari.events.base_events import FailedEventT
+
+import station_bot
+from station_bot import (
+    Config,
+    Database,
+    ErrorStore,
+    LogSink,
+    ReactionRoles,
+    RoleQueue,
+    SettingsStore,
+)
+from station_bot.fetch import Fetcher, create_session
+from station_bot.metrics import metrics
+from station_bot.scheduler import CronTrigger, IntervalTrigger
+from station_bot.startup import timeline
+from station_bot.utils import helpers
+
+log = logging.getLogger(__name__)
+
+plugin = lightbulb.Plugin("Core")
+
+
+async def record_shards() -> None:
+    # Every process writes a row for each shard it runs, so /stats can
+    # show the health of all of them.
+    bot = plugin.bot
+    guilds = collections.Counter(
+        hikari.snowflakes.calculate_shard_id(bot, guild_id)
+        for guild_id in bot.cache.get_guilds_view()
+    )
+
+    for shard_id, shard in bot.shards.items():
+        latency = shard.heartbeat_latency
+        await bot.d.db.q.save_shard(
+            shard_id,
+            bot.shard_count,
+            os.getpid(),
+            latency if shard.is_alive and math.isfinite(latency) else None,
+            guilds[shard_id],
+        )
+
+
+@plugin.listener(hikari.StartingEvent)
+async def on_starting(event: hikari.StartingEvent) -> None:
+    timeline.mark("Starting")
+    bot = plugin.bot
+    bot.d.log = LogSink(bot, interval=Config.LOG_FLUSH_INTERVAL)
+    bot.d.log.start()
+    bot.d.session = create_session(
+        limit=Config.HTTP_LIMIT,
+        limit_per_host=Config.HTTP_LIMIT_PER_HOST,
+        dns_ttl=Config.HTTP_DNS_TTL,
+    )
+    log.info("AIOHTTP session started.")
+    bot.d.fetch = Fetcher(
+        bot.d.session,
+        max_entries=Config.HTTP_CACHE_ENTRIES,
+        max_bytes=int(Config.HTTP_CACHE_MB * 1024**2),
+        disk_path=bot.d._dynamic / "http-cache" if Config.HTTP_DISK_CACHE else None,
+    )
+
+    bot.d.db = Database(
+        bot.d._dynamic,
+        bot.d._static,
+        readers=Config.DB_READERS,
+        write_behind=Config.DB_WRITE_BEHIND,
+        commit_latency=Config.DB_COMMIT_LATENCY,
+        commit_rows=Config.DB_COMMIT_ROWS,
+        slow_query=Config.DB_SLOW_QUERY_MS / 1_000,
+        busy_timeout=Config.DB_BUSY_TIMEOUT,
+    )
+
+    with timeline.phase("Database connect"):
+        await bot.d.db.connect()
+
+    bot.d.settings = SettingsStore(bot.d.db)
+    await bot.d.settings.start()
+    bot.d.scheduler.add_job(
+        bot.d.settings.sync, IntervalTrigger(seconds=Config.SETTINGS_SYNC_INTERVAL)
+    )
+
+    bot.d.reaction_roles = ReactionRoles(bot.d.db)
+
+    bot.d.errors = ErrorStore(bot.d.db, samples=Config.ERROR_SAMPLES)
+    bot.d.scheduler.add_job(
+        bot.d.errors.prune, CronTrigger(minute=30), jitter=60, persist=True
+    )
+
+    if Config.HTTP_DISK_CACHE:
+        bot.d.scheduler.add_job(bot.d.fetch.prune_disk, CronTrigger(minute=45))
+
+    await bot.d.scheduler.start(bot.d.db)
+
+    bot.d.roles = RoleQueue(bot)
+
+    bot.d.metrics = metrics
+    metrics.db = bot.d.db
+    metrics.scheduler = bot.d.scheduler
+    metrics.fetcher = bot.d.fetch
+    metrics.start()
+
+    if Config.METRICS_PORT:
+        await metrics.serve(Config.METRICS_HOST, Config.METRICS_PORT)
+
+
+@plugin.listener(hikari.StartedEvent)
+async def on_started(event: hikari.StartedEvent) -> None:
+    timeline.ready()
+    await record_shards()
+    plugin.bot.d.scheduler.add_job(
+        record_shards, IntervalTrigger(seconds=Config.SHARD_HEARTBEAT_INTERVAL)
+    )
+    plugin.bot.d.log.enqueue(
+        f"{station_bot.__productname__} is now online! "
+        f"(Version {station_bot.__version__})"
+    )
+
+
+@plugin.listener(hikari.StoppingEvent)
+async def on_stopping(event: hikari.StoppingEvent) -> None:
+    bot = plugin.bot
+    # Shutdown is ordered from here, since listeners for the same event
+    # run concurrently. Anything that writes to the database or calls
+    # the API stops first, then the scheduler and the jobs it's running,
+    # then the connections they all share.
+    await asyncio.gather(*(c.stop() for c in (bot.d.counters or {}).values()))
+
+    if bot.d.feeds:
+        await bot.d.feeds.close()
+
+    await bot.d.roles.close()
+    await bot.d.scheduler.close()
+    await metrics.close()
+    await bot.d.db.close()
+    await bot.d.session.close()
+    log.info("AIOHTTP session closed.")
+
+    bot.d.log.enqueue(
+        f"{station_bot.__productname__} is shutting down. "
+        f"(Version {station_bot.__version__})"
+    )
+    await bot.d.log.close()
+
+
+@plugin.listener(hikari.DMMessageCreateEvent)
+async def on_dm_message_create(event: hikari.DMMessageCreateEvent) -> None:
+    if event.message.author.is_bot:
+        return
+
+    await event.message.respond("I cannot work in direct messages.")
+
+
+@plugin.listener(hikari.ExceptionEvent)
+async def on_error(event: hikari.ExceptionEvent[FailedEventT]) -> None:
+    raise event.exception
+
+
+@plugin.listener(lightbulb.CommandErrorEvent)
+async def on_command_error(event: lightbulb.CommandErrorEvent) -> None:
+    exc = getattr(event.exception, "__cause__", event.exception)
+
+    if isinstance(exc, lightbulb.NotOwner):
+        await event.context.respond("You need to be an owner to do that.")
+        return
+
+    if isinstance(exc, lightbulb.OnlyInGuild):
+        await event.context.respond("That command can only be used in a server.")
+        return
+
+    if isinstance(exc, lightbulb.MissingRequiredPermission):
+        await event.context.respond(
+            f"You need the {exc.missing_perms} permission to do that."
+        )
+        return
+
+    # Add more errors when needed.
+
+    try:
+        err_id = helpers.generate_id()
+        err_hash = await plugin.bot.d.errors.record(
+            err_id, event.context.invoked_with, event.exception
+        )
+        await event.context.respond(
+            f"Something went wrong. An error report has been created (ID: {err_id})."
+        )
+        plugin.bot.d.log.enqueue(
+            f"Error report created (ID: {err_id}, group: {err_hash})."
+        )
+    finally:
+        raise event.exception
+
+
+def load(bot: lightbulb.BotApp) -> None:
+    bot.add_plugin(plugin)
+
+
+def unload(bot: lightbulb.BotApp) -> None:
+    bot.remove_plugin(plugin)
@@ -0,0 +1,81 @@
+import datetime as dt
+import logging
+import typing as t
+
+import hikari
+import lightbulb
+
+from station_bot import Config
+from station_bot.extensions.general import NOTIFICATION_MAP
+from station_bot.feeds import FeedPoller
+from station_bot.scheduler import IntervalTrigger
+from station_bot.settings import GuildSettings
+
+# Entries are announced in every cached guild with a feed channel set.
+CACHE: t.Final = hikari.api.CacheComponents.GUILDS
+
+log = logging.getLogger(__name__)
+
+plugin = lightbulb.Plugin("Feeds")
+
+
+async def poll_feeds() -> None:
+    if not (urls := Config.FEED_URLS.split()):
+        return
+
+    if not (entries := await plugin.bot.d.feeds.poll(urls)):
+        return
+
+    # Each shard process polls for itself and only announces in the
+    # guilds its shards own.
+    for guild_id in plugin.bot.cache.get_guilds_view():
+        settings: GuildSettings = await plugin.bot.d.settings.get(guild_id)
+
+        if not (channel_id := settings.feed_channel_id):
+            continue
+
+        role_id: int = getattr(settings, NOTIFICATION_MAP["streams"])
+        mention = f"<@&{role_id}> " if role_id else ""
+
+        for entry in entries:
+            try:
+                await plugin.bot.rest.create_message(
+                    channel_id,
+                    f"{mention}**{entry.title}**\n{entry.link}",
+                    role_mentions=[role_id] if role_id else False,
+                )
+            except hikari.HikariError:
+                log.exception(f"Failed to announce feed entries in guild {guild_id}")
+                break
+
+    log.info(f"Announced {len(entries):,} new feed entries")
+
+
+@plugin.listener(hikari.StartedEvent)
+async def on_started(_: hikari.StartedEvent) -> None:
+    if not Config.FEED_URLS.split():
+        return
+
+    bot = plugin.bot
+    bot.d.feeds = FeedPoller(
+        bot.d.db,
+        bot.d.session,
+        concurrency=Config.FEED_CONCURRENCY,
+        timeout=Config.FEED_TIMEOUT,
+    )
+    bot.d.scheduler.add_job(
+        poll_feeds,
+        IntervalTrigger(
+            seconds=Config.FEED_INTERVAL,
+            start=dt.datetime.utcnow() + dt.timedelta(seconds=5),
+        ),
+        jitter=Config.FEED_INTERVAL / 10,
+    )
+
+
+def load(bot: lightbulb.BotApp) -> None:
+    bot.add_plugin(plugin)
+
+
+def unload(bot: lightbulb.BotApp) -> None:
+    bot.remove_plugin(plugin)
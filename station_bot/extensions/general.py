@@ -1,3 +1,6 @@
+import asyncio
+import contextlib
+import datetime as dt
 import logging
 import typing as t
 
@@ -5,107 +8,225 @@ import hikari
 import lightbulb
 
 from station_bot import Config
+from station_bot.settings import GuildSettings
 
 log = logging.getLogger(__name__)
 
 plugin = lightbulb.Plugin("General")
 
-NOTIFICATION_MAP: t.Mapping[str, int] = {
-    "streams": Config.STREAMS_ROLE_ID,
+# Role changes are checked against cached members.
+CACHE: t.Final = hikari.api.CacheComponents.MEMBERS
+
+# Maps to settings rather than IDs so each guild can use its own roles.
+NOTIFICATION_MAP: t.Mapping[str, str] = {
+    "streams": "streams_role_id",
 }
 
 
-async def update_member_count() -> None:
-    channel = await plugin.bot.rest.fetch_channel(Config.MEMBER_COUNT_CHANNEL_ID)
+class MemberCounter:
+    __slots__ = ("guild_id", "count", "written", "_dirty", "_task")
 
-    if not isinstance(channel, hikari.GuildVoiceChannel):
-        return
+    def __init__(self, guild_id: int) -> None:
+        self.guild_id = guild_id
+        self.count: int | None = None
+        self.written: int | None = None
+        self._dirty = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
 
-    member_count = len(
-        [
-            m
-            async for m in plugin.bot.rest.fetch_members(Config.GUILD_ID)
-            if not m.is_bot
-        ]
-    )
+    @property
+    def seeded(self) -> bool:
+        return self.count is not None
 
-    await channel.edit(name=f"Members: {member_count}")
+    def seed(self, count: int, *, written: int | None = None) -> None:
+        self.count = count
 
+        if written is not None:
+            self.written = written
 
-@plugin.listener(hikari.StartedEvent)
-async def on_started(_: hikari.StartedEvent) -> None:
-    await update_member_count()
+        self._dirty.set()
 
+    def adjust(self, delta: int) -> None:
+        # Until the counter is seeded, the seed itself will include this
+        # change.
+        if self.count is None:
+            return
 
-@plugin.listener(hikari.MemberCreateEvent)
-async def on_member_join(event: hikari.MemberCreateEvent) -> None:
-    if event.member.guild_id != Config.GUILD_ID:
-        return
+        self.count += delta
+        self._dirty.set()
 
-    log.info(f"Member '{event.member.display_name}' joined")
-    await update_member_count()
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
 
+    async def stop(self) -> None:
+        if (task := self._task) is None:
+            return
 
-@plugin.listener(hikari.MemberDeleteEvent)
-async def on_member_leave(event: hikari.MemberDeleteEvent) -> None:
-    member = event.old_member
+        self._task = None
+        task.cancel()
 
-    if not member:
-        return
+        # Awaited so nothing is still writing when the database closes.
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    async def _run(self) -> None:
+        # Channel renames are heavily rate limited, so write at most
+        # once per window. Anything that changes during the window is
+        # picked up by the next pass, which always writes the latest
+        # count.
+        while True:
+            # Quiet guilds still wake up within the snapshot's lifetime,
+            # so a restart can seed from it instead of a member scan.
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    self._dirty.wait(), Config.MEMBER_COUNT_SNAPSHOT_TTL / 2
+                )
+
+            self._dirty.clear()
+
+            if (count := self.count) is None:
+                continue
+
+            try:
+                await self._update(count)
+            except Exception:
+                # Any failure is retried on the next pass rather than
+                # stopping this guild's counter.
+                log.exception(
+                    f"Failed to update the member count in guild {self.guild_id}"
+                )
+                self._dirty.set()
+
+            await asyncio.sleep(Config.MEMBER_COUNT_INTERVAL)
+
+    async def _update(self, count: int) -> None:
+        if count != self.written:
+            await self._write(count)
+
+        # A restart takes the snapshot as what the channel shows, so
+        # it's only saved once the write has gone through.
+        await plugin.bot.d.db.q.save_member_count(self.guild_id, count)
+
+    async def _write(self, count: int) -> None:
+        settings: GuildSettings = await plugin.bot.d.settings.get(self.guild_id)
+
+        if not settings.member_count_channel_id:
+            return
+
+        await plugin.bot.rest.edit_channel(
+            settings.member_count_channel_id, name=f"Members: {count}"
+        )
+        self.written = count
+        log.info(f"Member count for guild {self.guild_id} updated to {count}")
+
+
+# Guild ID -> counter, for the guilds this process's shards own.
+counters: dict[int, MemberCounter] = {}
+
+
+async def fetch_member_snapshot(guild_id: int) -> int | None:
+    row = await plugin.bot.d.db.q.member_count(guild_id)
+
+    if not row:
+        return None
+
+    age = dt.datetime.utcnow() - row.mc_time
+    if age.total_seconds() > Config.MEMBER_COUNT_SNAPSHOT_TTL:
+        return None
+
+    return t.cast(int, row.mc_count)
 
-    if member.guild_id != Config.GUILD_ID:
-        return
 
-    log.info(f"Member '{member.display_name}' left")
-    await plugin.bot.rest.create_message(
-        Config.LOG_CHANNEL_ID,
-        f"{member.display_name} is no longer in the server. (ID: {member.id})",
+async def scan_member_count(guild_id: int) -> int:
+    return len(
+        [m async for m in plugin.bot.rest.fetch_members(guild_id) if not m.is_bot]
     )
-    await update_member_count()
 
 
-@plugin.listener(hikari.GuildReactionAddEvent)
-async def on_reaction_add(event: hikari.GuildReactionAddEvent) -> None:
-    if event.message_id != Config.RULES_MESSAGE_ID:
-        return
+@plugin.listener(hikari.GuildAvailableEvent)
+async def on_guild_available(event: hikari.GuildAvailableEvent) -> None:
+    if (counter := counters.get(event.guild_id)) is None:
+        counter = counters[event.guild_id] = MemberCounter(event.guild_id)
 
-    if Config.PASSENGER_ROLE_ID in event.member.role_ids:
-        return
+    # Small guilds send every member with the guild payload, which is an
+    # authoritative count. Otherwise prefer a recent snapshot over a
+    # full scan.
+    if len(event.members) >= (event.guild.member_count or 0):
+        counter.seed(sum(not m.is_bot for m in event.members.values()))
+        log.info(
+            f"Member count for guild {event.guild_id} seeded from the gateway "
+            f"({counter.count})"
+        )
+    elif not counter.seeded:
+        if (count := await fetch_member_snapshot(event.guild_id)) is not None:
+            counter.seed(count, written=count)
+            log.info(
+                f"Member count for guild {event.guild_id} seeded from snapshot "
+                f"({count})"
+            )
+        else:
+            counter.seed(await scan_member_count(event.guild_id))
+            log.info(
+                f"Member count for guild {event.guild_id} seeded from a member "
+                f"scan ({counter.count})"
+            )
 
-    await event.member.add_role(Config.PASSENGER_ROLE_ID)
+    counter.start()
 
 
-@plugin.listener(hikari.GuildReactionDeleteEvent)
-async def on_reaction_delete(event: hikari.GuildReactionDeleteEvent) -> None:
-    if event.message_id != Config.RULES_MESSAGE_ID:
-        return
+@plugin.listener(hikari.GuildLeaveEvent)
+async def on_guild_leave(event: hikari.GuildLeaveEvent) -> None:
+    if counter := counters.pop(event.guild_id, None):
+        await counter.stop()
+
+
+@plugin.listener(hikari.MemberCreateEvent)
+async def on_member_join(event: hikari.MemberCreateEvent) -> None:
+    log.info(f"Member '{event.member.display_name}' joined guild {event.guild_id}")
+
+    if not event.member.is_bot and (counter := counters.get(event.guild_id)):
+        counter.adjust(1)
 
-    member = await plugin.bot.rest.fetch_member(Config.GUILD_ID, event.user_id)
 
-    if not Config.PASSENGER_ROLE_ID in member.role_ids:
+@plugin.listener(hikari.MemberDeleteEvent)
+async def on_member_leave(event: hikari.MemberDeleteEvent) -> None:
+    if not event.user.is_bot and (counter := counters.get(event.guild_id)):
+        counter.adjust(-1)
+
+    if not (member := event.old_member):
         return
 
-    await member.remove_role(Config.PASSENGER_ROLE_ID)
+    log.info(f"Member '{member.display_name}' left guild {event.guild_id}")
+    settings: GuildSettings = await plugin.bot.d.settings.get(event.guild_id)
+
+    if settings.log_channel_id:
+        plugin.bot.d.log.enqueue(
+            f"{member.display_name} is no longer in the server. (ID: {member.id})",
+            settings.log_channel_id,
+        )
 
 
 @plugin.command
+@lightbulb.add_checks(lightbulb.guild_only)
 @lightbulb.option("type", "Type of notification to receive.")
 @lightbulb.command("notify", "Toggle subscription of a type of notification.")
 @lightbulb.implements(lightbulb.SlashCommand)
 async def cmd_notify(ctx: lightbulb.SlashContext) -> None:
-    if not ctx.channel_id == Config.ROLE_ASSIGN_CHANNEL_ID:
-        await ctx.respond(
-            f"This command can only be used in <#{Config.ROLE_ASSIGN_CHANNEL_ID}>.",
-            delete_after=5,
-        )
+    if not ctx.member:
         return
 
-    if not ctx.member:
+    settings: GuildSettings = await ctx.bot.d.settings.get(ctx.member.guild_id)
+    channel_id = settings.role_assign_channel_id
+
+    if channel_id and ctx.channel_id != channel_id:
+        await ctx.respond(
+            f"This command can only be used in <#{channel_id}>.", delete_after=5
+        )
         return
 
     type = ctx.options.type.lower()
 
-    if not (role := NOTIFICATION_MAP.get(type)):
+    if not (key := NOTIFICATION_MAP.get(type)):
         await ctx.respond(
             "That is not a valid notification type.\nValid types are: "
             + ", ".join(NOTIFICATION_MAP.keys()),
@@ -113,17 +234,29 @@ async def cmd_notify(ctx: lightbulb.SlashContext) -> None:
         )
         return
 
-    if role in ctx.member.role_ids:
-        await ctx.member.remove_role(role)
+    if not (role := getattr(settings, key)):
+        await ctx.respond(
+            f"{type.capitalize()} notifications aren't set up in this server.",
+            delete_after=5,
+        )
+        return
+
+    roles = ctx.bot.d.roles
+    member = ctx.member
+
+    if roles.has_role(member.guild_id, member.id, role, member.role_ids):
+        roles.remove(member.guild_id, member.id, role, member.role_ids)
         await ctx.respond(
             f"You will no longer receive {type} notifications.", delete_after=5
         )
     else:
-        await ctx.member.add_role(role)
+        roles.add(member.guild_id, member.id, role, member.role_ids)
         await ctx.respond(f"You will now receive {type} notifications.", delete_after=5)
 
 
 def load(bot: lightbulb.BotApp) -> None:
+    # Core stops these on shutdown, before the database they write to.
+    bot.d.counters = counters
     bot.add_plugin(plugin)
 
 
@@ -2,20 +2,63 @@ import datetime as dt
 import logging
 import platform
 import time
+import typing as t
 
 import hikari
 import lightbulb
-from psutil import Process, virtual_memory
 
 import station_bot
 from station_bot import Config
+from station_bot.metrics import Metrics
+from station_bot.startup import lazy_import
 from station_bot.utils import chron, helpers
 
+# /about and /stats look the bot's member up in the cache.
+INTENTS: t.Final = hikari.Intents.GUILDS | hikari.Intents.GUILD_MEMBERS
+CACHE: t.Final = hikari.api.CacheComponents.MEMBERS
+# Embed fields are capped at 1,024 characters.
+MAX_SHARD_LINES: t.Final = 20
+
+# psutil is only needed by /stats, so it isn't loaded until then.
+psutil = lazy_import("psutil")
+
 log = logging.getLogger(__name__)
 
 plugin = lightbulb.Plugin("Meta")
 
 
+async def shard_health(bot: lightbulb.BotApp) -> str:
+    # Shards run by other processes are only known from their
+    # heartbeats, so one that stops sending them is shown as down.
+    count = bot.shard_count
+    rows = {row.sh_id: row for row in await bot.d.db.q.shard_health(count, count)}
+    now = dt.datetime.utcnow()
+    lines = []
+
+    for shard_id in range(count):
+        if not (row := rows.get(shard_id)):
+            lines.append(f"{shard_id}: not reported")
+            continue
+
+        age = now - row.sh_seen
+
+        if age.total_seconds() > Config.SHARD_HEARTBEAT_INTERVAL * 3:
+            lines.append(f"{shard_id}: down (last seen {chron.short_delta(age)} ago)")
+        elif row.sh_latency is None:
+            lines.append(f"{shard_id}: connecting (PID {row.sh_pid})")
+        else:
+            lines.append(
+                f"{shard_id}: {row.sh_latency * 1_000:,.0f} ms, "
+                f"{row.sh_guilds:,} guilds (PID {row.sh_pid})"
+            )
+
+    if len(lines) > MAX_SHARD_LINES:
+        more = len(lines) - MAX_SHARD_LINES
+        lines = [*lines[:MAX_SHARD_LINES], f"and {more:,} more"]
+
+    return "\n".join(lines) or "None yet"
+
+
 @plugin.command
 @lightbulb.command("ping", "Get the average DWSP latency for the bot.")
 @lightbulb.implements(lightbulb.SlashCommand)
@@ -26,6 +69,7 @@ async def cmd_ping(ctx: lightbulb.SlashContext) -> None:
 
 
 @plugin.command
+@lightbulb.add_checks(lightbulb.guild_only)
 @lightbulb.command("about", f"View information about {station_bot.__productname__}.")
 @lightbulb.implements(lightbulb.SlashCommand)
 async def cmd_about(ctx: lightbulb.SlashContext) -> None:
@@ -61,6 +105,7 @@ async def cmd_about(ctx: lightbulb.SlashContext) -> None:
 
 
 @plugin.command
+@lightbulb.add_checks(lightbulb.guild_only)
 @lightbulb.command("stats", f"View runtime stats for {station_bot.__productname__}.")
 @lightbulb.implements(lightbulb.SlashCommand)
 async def cmd_stats(ctx: lightbulb.SlashContext) -> None:
@@ -73,17 +118,20 @@ async def cmd_stats(ctx: lightbulb.SlashContext) -> None:
     if not (member := ctx.member):
         return
 
-    with (proc := Process()).oneshot():
+    with (proc := psutil.Process()).oneshot():
         uptime = time.time() - proc.create_time()
         uptime_str = chron.short_delta(dt.timedelta(seconds=uptime))
         cpu_time = chron.short_delta(
             dt.timedelta(seconds=(cpu := proc.cpu_times()).system + cpu.user),
             ms=True,
         )
-        mem_total = virtual_memory().total / (1024**2)
+        mem_total = psutil.virtual_memory().total / (1024**2)
         mem_of_total = proc.memory_percent()
         mem_usage = mem_total * (mem_of_total / 100)
 
+    m: Metrics = ctx.bot.d.metrics
+    shards = await shard_health(ctx.bot)
+
     await ctx.respond(
         hikari.Embed(
             title=f"Runtime statistics for {station_bot.__productname__}",
@@ -106,7 +154,74 @@ async def cmd_stats(ctx: lightbulb.SlashContext) -> None:
         )
         .add_field(
             "Database calls",
-            f"{(c := ctx.bot.d.db.calls):,} ({c/uptime:,.3f} per second)",
+            f"{(c := (db := ctx.bot.d.db).calls):,} ({c/uptime:,.3f} per second)\n"
+            f"{db.reads:,} on the read pool "
+            f"({db.busy}/{db.pool_size} busy, peak {db.peak}), "
+            f"{db.fallbacks:,} on the writer\n"
+            f"{db.writes:,} writes in {db.commits:,} commits",
+        )
+        .add_field(
+            "Database latency",
+            f"{db.latency.summary()} ms\n"
+            f"{db.wait_time:,.3f}s queued, {db.exec_time:,.3f}s executing",
+        )
+        .add_field(
+            "Event loop lag",
+            f"{m.loop_lag.summary()} ms (max {m.loop_lag.max * 1_000:,.1f} ms)",
+        )
+        .add_field(
+            "Gateway events",
+            f"{(e := sum(m.events_received.values())):,} received "
+            f"({e/uptime:,.3f} per second), "
+            f"{sum(m.events_handled.values()):,} handled\n"
+            + ", ".join(f"{k} {v:,}" for k, v in m.events_received.most_common(3)),
+        )
+        .add_field(
+            "Listener time",
+            "\n".join(
+                f"{name}: {h.total:,.3f}s over {h.count:,} calls "
+                f"(p99 {h.percentile(99) * 1_000:,.1f} ms)"
+                for name, h in sorted(
+                    m.listeners.items(), key=lambda i: i[1].total, reverse=True
+                )[:5]
+            )
+            or "None yet",
+        )
+        .add_field(
+            "Commands",
+            f"{sum(m.commands.values()):,} invoked, "
+            f"{sum(m.command_errors.values()):,} failed",
+        )
+        .add_field(
+            "REST calls",
+            f"{m.rest_latency.count:,} calls ({m.rest_latency.summary()} ms)\n"
+            f"{m.rate_limit_wait.count:,} rate limit waits "
+            f"({m.rate_limit_wait.total:,.3f}s)",
+        )
+        .add_field(
+            "HTTP cache",
+            f"{(f := ctx.bot.d.fetch).hit_rate:.1%} served from cache, "
+            f"{len(f.entries):,} entries ({f.size / 1024:,.1f} KiB)",
+        )
+        .add_field(
+            "Guild settings",
+            f"{(s := ctx.bot.d.settings).hit_rate:.1%} served from cache, "
+            f"{len(s.cache):,} guilds cached",
+        )
+        .add_field(
+            "Reaction roles",
+            f"{len((rr := ctx.bot.d.reaction_roles).index):,} messages indexed, "
+            f"{rr.matched:,} of {rr.checked:,} reactions matched",
+        )
+        .add_field(f"Shards ({ctx.bot.shard_count})", shards)
+        .add_field(
+            "Startup",
+            ctx.bot.d.timeline.brief(),
+        )
+        .add_field(
+            "Role changes",
+            f"{(r := ctx.bot.d.roles).dispatched:,} sent, {r.saved:,} saved, "
+            f"{r.failed:,} failed ({r.depth:,} queued)",
         )
     )
 
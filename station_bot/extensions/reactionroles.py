@@ -0,0 +1,213 @@
+import logging
+import re
+import typing as t
+
+import hikari
+import lightbulb
+
+from station_bot.reaction_roles import ANY_EMOJI, ReactionRoles, emoji_key
+
+MESSAGE_LINK_PATTERN: t.Final = re.compile(
+    r"^https://(?:\w+\.)?discord(?:app)?\.com/channels/(\d+)/(\d+)/(\d+)$"
+)
+ANY_EMOJI_VALUES: t.Final = frozenset((ANY_EMOJI, "any"))
+MESSAGE_LIMIT: t.Final = 2_000
+
+log = logging.getLogger(__name__)
+
+plugin = lightbulb.Plugin("Reaction roles")
+
+
+def parse_message(guild_id: int, channel_id: int, text: str) -> tuple[int, int] | None:
+    if match := MESSAGE_LINK_PATTERN.match(text):
+        link_guild_id, link_channel_id, message_id = map(int, match.groups())
+        return (link_channel_id, message_id) if link_guild_id == guild_id else None
+
+    if text.isdigit():
+        return channel_id, int(text)
+
+    return None
+
+
+def parse_emoji(text: str) -> tuple[str, hikari.Emoji | None]:
+    if text.lower() in ANY_EMOJI_VALUES:
+        return ANY_EMOJI, None
+
+    emoji = hikari.Emoji.parse(text)
+    return emoji_key(getattr(emoji, "id", None), emoji.name), emoji
+
+
+def describe(guild_id: int, row: t.Any) -> str:
+    if row.rr_emoji == ANY_EMOJI:
+        emoji = "Any emoji"
+    elif row.rr_emoji.isdigit():
+        emoji = f"<:_:{row.rr_emoji}>"
+    else:
+        emoji = row.rr_emoji
+
+    if row.rr_channel_id:
+        message = (
+            f"https://discord.com/channels/{guild_id}/{row.rr_channel_id}/"
+            f"{row.rr_message_id}"
+        )
+    else:
+        message = f"Message {row.rr_message_id}"
+
+    return f"{emoji} on {message} gives <@&{row.rr_role_id}>"
+
+
+def is_me(user_id: int) -> bool:
+    return (me := plugin.bot.get_me()) is not None and me.id == user_id
+
+
+@plugin.listener(hikari.GuildAvailableEvent)
+async def on_guild_available(event: hikari.GuildAvailableEvent) -> None:
+    await plugin.bot.d.reaction_roles.load_guild(event.guild_id)
+
+
+@plugin.listener(hikari.GuildLeaveEvent)
+async def on_guild_leave(event: hikari.GuildLeaveEvent) -> None:
+    plugin.bot.d.reaction_roles.unload_guild(event.guild_id)
+
+
+@plugin.listener(hikari.GuildReactionAddEvent)
+async def on_reaction_add(event: hikari.GuildReactionAddEvent) -> None:
+    role_id = plugin.bot.d.reaction_roles.lookup(
+        event.message_id, event.emoji_id, event.emoji_name
+    )
+
+    # The bot reacts to messages itself when reaction roles are added.
+    if role_id is None or is_me(event.user_id):
+        return
+
+    plugin.bot.d.roles.add(
+        event.guild_id, event.user_id, role_id, event.member.role_ids
+    )
+
+
+@plugin.listener(hikari.GuildReactionDeleteEvent)
+async def on_reaction_delete(event: hikari.GuildReactionDeleteEvent) -> None:
+    role_id = plugin.bot.d.reaction_roles.lookup(
+        event.message_id, event.emoji_id, event.emoji_name
+    )
+
+    if role_id is None or is_me(event.user_id):
+        return
+
+    plugin.bot.d.roles.remove(event.guild_id, event.user_id, role_id)
+
+
+@plugin.command
+@lightbulb.add_checks(
+    lightbulb.guild_only,
+    lightbulb.has_guild_permissions(hikari.Permissions.MANAGE_ROLES),
+)
+@lightbulb.command("reactionroles", "Manage roles given by reacting to messages.")
+@lightbulb.implements(lightbulb.SlashCommandGroup)
+async def cmd_reactionroles(_: lightbulb.SlashContext) -> None:
+    pass
+
+
+@cmd_reactionroles.child
+@lightbulb.option("role", "The role to give.", type=hikari.Role)
+@lightbulb.option("emoji", "The emoji to react with, or 'any' for any emoji.")
+@lightbulb.option("message", "A message link, or the ID of a message in this channel.")
+@lightbulb.command(
+    "add",
+    "Give a role to members who react to a message.",
+    inherit_checks=True,
+    ephemeral=True,
+)
+@lightbulb.implements(lightbulb.SlashSubCommand)
+async def cmd_reactionroles_add(ctx: lightbulb.SlashContext) -> None:
+    assert ctx.guild_id is not None
+    role: hikari.Role = ctx.options.role
+
+    if not (target := parse_message(ctx.guild_id, ctx.channel_id, ctx.options.message)):
+        await ctx.respond("That isn't a link to or ID of a message in this server.")
+        return
+
+    if role.is_managed or role.id == ctx.guild_id:
+        await ctx.respond("That role can't be given out.")
+        return
+
+    channel_id, message_id = target
+    key, emoji = parse_emoji(ctx.options.emoji.strip())
+
+    # Reacting first checks both the message and the emoji exist, and
+    # leaves a reaction for members to click.
+    try:
+        if emoji:
+            await ctx.bot.rest.add_reaction(channel_id, message_id, emoji)
+        else:
+            await ctx.bot.rest.fetch_message(channel_id, message_id)
+    except hikari.NotFoundError:
+        await ctx.respond("That message couldn't be found.")
+        return
+    except hikari.BadRequestError:
+        await ctx.respond("That emoji can't be used here.")
+        return
+
+    rr: ReactionRoles = ctx.bot.d.reaction_roles
+    await rr.add(ctx.guild_id, channel_id, message_id, key, role.id)
+    await ctx.respond(
+        f"Reacting with {emoji or 'any emoji'} now gives {role.mention}.",
+        role_mentions=False,
+    )
+
+
+@cmd_reactionroles.child
+@lightbulb.option("emoji", "The emoji, or 'any'.")
+@lightbulb.option("message", "A message link, or the ID of a message in this channel.")
+@lightbulb.command(
+    "remove",
+    "Stop giving a role for reacting to a message.",
+    inherit_checks=True,
+    ephemeral=True,
+)
+@lightbulb.implements(lightbulb.SlashSubCommand)
+async def cmd_reactionroles_remove(ctx: lightbulb.SlashContext) -> None:
+    assert ctx.guild_id is not None
+
+    if not (target := parse_message(ctx.guild_id, ctx.channel_id, ctx.options.message)):
+        await ctx.respond("That isn't a link to or ID of a message in this server.")
+        return
+
+    key, _ = parse_emoji(ctx.options.emoji.strip())
+    rr: ReactionRoles = ctx.bot.d.reaction_roles
+
+    if not await rr.remove(ctx.guild_id, target[1], key):
+        await ctx.respond("That message has no reaction role for that emoji.")
+        return
+
+    await ctx.respond("Reaction role removed.")
+
+
+@cmd_reactionroles.child
+@lightbulb.command(
+    "list", "List this server's reaction roles.", inherit_checks=True, ephemeral=True
+)
+@lightbulb.implements(lightbulb.SlashSubCommand)
+async def cmd_reactionroles_list(ctx: lightbulb.SlashContext) -> None:
+    assert ctx.guild_id is not None
+    rr: ReactionRoles = ctx.bot.d.reaction_roles
+
+    if not (rows := await rr.entries(ctx.guild_id)):
+        await ctx.respond("This server has no reaction roles.")
+        return
+
+    text = "\n".join(describe(ctx.guild_id, row) for row in rows)
+
+    if len(text) <= MESSAGE_LIMIT:
+        await ctx.respond(text, role_mentions=False)
+        return
+
+    await ctx.respond(attachment=hikari.Bytes(text.encode(), "reactionroles.txt"))
+
+
+def load(bot: lightbulb.BotApp) -> None:
+    bot.add_plugin(plugin)
+
+
+def unload(bot: lightbulb.BotApp) -> None:
+    bot.remove_plugin(plugin)
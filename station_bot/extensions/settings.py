@@ -0,0 +1,112 @@
+import logging
+import re
+import typing as t
+
+import hikari
+import lightbulb
+
+from station_bot.settings import GuildSettings
+
+# Accepts a bare ID or a channel or role mention.
+ID_PATTERN: t.Final = re.compile(r"^(?:<#|<@&)?(\d+)>?$")
+CLEAR_VALUES: t.Final = frozenset(("0", "none", "off"))
+
+log = logging.getLogger(__name__)
+
+plugin = lightbulb.Plugin("Settings")
+
+
+def describe(name: str, value: int) -> str:
+    if not value:
+        return "Not set"
+
+    if name.endswith("_channel_id"):
+        return f"<#{value}>"
+
+    if name.endswith("_role_id"):
+        return f"<@&{value}>"
+
+    return str(value)
+
+
+def check_value(bot: lightbulb.BotApp, guild_id: int, name: str, value: int) -> bool:
+    # Checked against the cache so a setting can't point at another
+    # server's channel or role.
+    if not value:
+        return True
+
+    if name.endswith("_channel_id"):
+        channel = bot.cache.get_guild_channel(value)
+        return channel is not None and channel.guild_id == guild_id
+
+    if name.endswith("_role_id"):
+        role = bot.cache.get_role(value)
+        return role is not None and role.guild_id == guild_id
+
+    return True
+
+
+@plugin.command
+@lightbulb.add_checks(
+    lightbulb.guild_only,
+    lightbulb.has_guild_permissions(hikari.Permissions.MANAGE_GUILD),
+)
+@lightbulb.command("settings", "View or change this server's settings.")
+@lightbulb.implements(lightbulb.SlashCommandGroup)
+async def cmd_settings(_: lightbulb.SlashContext) -> None:
+    pass
+
+
+@cmd_settings.child
+@lightbulb.command(
+    "view", "View this server's settings.", inherit_checks=True, ephemeral=True
+)
+@lightbulb.implements(lightbulb.SlashSubCommand)
+async def cmd_settings_view(ctx: lightbulb.SlashContext) -> None:
+    assert ctx.guild_id is not None
+    settings: GuildSettings = await ctx.bot.d.settings.get(ctx.guild_id)
+
+    await ctx.respond(
+        "\n".join(
+            f"**{name}**: {describe(name, getattr(settings, name))}"
+            for name in GuildSettings.fields()
+        ),
+        role_mentions=False,
+    )
+
+
+@cmd_settings.child
+@lightbulb.option("value", "A channel or role, or 'none' to clear it.")
+@lightbulb.option("name", "The setting to change.", choices=GuildSettings.fields())
+@lightbulb.command(
+    "set", "Change one of this server's settings.", inherit_checks=True, ephemeral=True
+)
+@lightbulb.implements(lightbulb.SlashSubCommand)
+async def cmd_settings_set(ctx: lightbulb.SlashContext) -> None:
+    assert ctx.guild_id is not None
+    name, text = ctx.options.name, ctx.options.value.strip().lower()
+
+    if text in CLEAR_VALUES:
+        value = 0
+    elif match := ID_PATTERN.match(text):
+        value = int(match[1])
+    else:
+        await ctx.respond("That isn't a valid ID or mention.")
+        return
+
+    if not check_value(ctx.bot, ctx.guild_id, name, value):
+        await ctx.respond(f"That isn't a valid {name} in this server.")
+        return
+
+    await ctx.bot.d.settings.set(ctx.guild_id, **{name: value})
+    await ctx.respond(
+        f"**{name}** is now {describe(name, value)}.", role_mentions=False
+    )
+
+
+def load(bot: lightbulb.BotApp) -> None:
+    bot.add_plugin(plugin)
+
+
+def unload(bot: lightbulb.BotApp) -> None:
+    bot.remove_plugin(plugin)
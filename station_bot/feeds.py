@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import typing as t
+
+import aiohttp
+
+from station_bot.startup import lazy_import
+
+if t.TYPE_CHECKING:
+    import feedparser
+
+    from station_bot.db import Database
+else:
+    feedparser = lazy_import("feedparser")
+
+log = logging.getLogger(__name__)
+
+
+class FeedEntry:
+    __slots__ = ("url", "guid", "title", "link")
+
+    def __init__(self, url: str, guid: str, title: str, link: str) -> None:
+        self.url = url
+        self.guid = guid
+        self.title = title
+        self.link = link
+
+    def __repr__(self) -> str:
+        return f"FeedEntry(url={self.url!r}, guid={self.guid!r})"
+
+
+class FeedPoller:
+    __slots__ = (
+        "db",
+        "session",
+        "semaphore",
+        "timeout",
+        "validators",
+        "seen",
+        "polls",
+        "not_modified",
+        "failures",
+        "took",
+        "closing",
+        "_polls",
+    )
+
+    def __init__(
+        self,
+        db: Database,
+        session: aiohttp.ClientSession,
+        *,
+        concurrency: int = 8,
+        timeout: float = 20.0,
+    ) -> None:
+        self.db = db
+        # Feeds don't go through the shared Fetcher: their validators
+        # are kept in the database so they survive restarts, and a 304
+        # has to skip parsing rather than hand back a cached body.
+        self.session = session
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        # URL -> (ETag, Last-Modified) from the last full response.
+        self.validators: dict[str, tuple[str | None, str | None]] = {}
+        # URL -> GUIDs of the entries in the feed when it was last
+        # polled, loaded from the database until a poll succeeds.
+        self.seen: dict[str, set[str]] = {}
+        self.polls = 0
+        self.not_modified = 0
+        self.failures = 0
+        self.took = 0.0
+        self.closing = False
+        self._polls: set[asyncio.Future[list[list[FeedEntry]]]] = set()
+
+    async def poll(self, urls: t.Iterable[str]) -> list[FeedEntry]:
+        if self.closing:
+            return []
+
+        start = time.perf_counter()
+        future = asyncio.gather(*(self.poll_one(url) for url in urls))
+        self._polls.add(future)
+
+        try:
+            results = await future
+        finally:
+            self._polls.discard(future)
+
+        self.took = time.perf_counter() - start
+        return [entry for entries in results for entry in entries]
+
+    async def close(self) -> None:
+        # Polls already running finish, since they save what they've
+        # fetched; no new ones start.
+        self.closing = True
+
+        if self._polls:
+            await asyncio.gather(*self._polls, return_exceptions=True)
+
+    async def poll_one(self, url: str) -> list[FeedEntry]:
+        try:
+            return await self._poll(url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+            self.failures += 1
+            log.warning(f"Failed to poll feed {url} ({type(ex).__name__}: {ex})")
+            return []
+        except Exception:
+            self.failures += 1
+            log.exception(f"Failed to poll feed {url}")
+            return []
+
+    async def _poll(self, url: str) -> list[FeedEntry]:
+        seen, first = await self._load(url)
+        etag, modified = self.validators.get(url, (None, None))
+        headers = {}
+
+        if etag:
+            headers["If-None-Match"] = etag
+
+        if modified:
+            headers["If-Modified-Since"] = modified
+
+        # Only the request holds a slot; parsing happens off the loop
+        # once the connection has been released.
+        async with self.semaphore:
+            self.polls += 1
+
+            async with self.session.get(
+                url, headers=headers, timeout=self.timeout
+            ) as resp:
+                if resp.status == 304:
+                    self.not_modified += 1
+                    self.seen[url] = seen
+                    return []
+
+                resp.raise_for_status()
+                body = await resp.read()
+                validators = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+        parsed = await asyncio.to_thread(feedparser.parse, body)
+
+        if parsed.bozo and not parsed.entries:
+            raise ValueError(f"feed could not be parsed: {parsed.bozo_exception}")
+
+        guids: set[str] = set()
+        entries = []
+
+        # Feeds list the newest entries first, so they're reversed to
+        # announce them in the order they were published.
+        for raw in reversed(parsed.entries):
+            if not (guid := raw.get("id") or raw.get("link") or raw.get("title")):
+                continue
+
+            if guid in guids:
+                continue
+
+            guids.add(guid)
+
+            if guid not in seen:
+                entries.append(
+                    FeedEntry(url, guid, raw.get("title", ""), raw.get("link", ""))
+                )
+
+        if entries:
+            await self.db.q.mark_feed_entries(*((url, entry.guid) for entry in entries))
+
+        self.validators[url] = validators
+        await self.db.q.save_feed_state(url, *validators)
+
+        # Entries that have dropped out of the feed won't come back, so
+        # only the current ones need remembering, here or in the
+        # database.
+        if seen - guids:
+            await self.db.q.prune_feed_entries(url, json.dumps(list(guids)))
+
+        self.seen[url] = guids
+
+        # Everything in a feed polled for the first time is already old
+        # news, so it's only marked as seen.
+        return [] if first else entries
+
+    async def _load(self, url: str) -> tuple[set[str], bool]:
+        if (seen := self.seen.get(url)) is not None:
+            return seen, False
+
+        # Nothing is kept until a poll succeeds, and the feed state is
+        # only saved by one, so a feed whose first poll fails is still
+        # treated as new the next time.
+        seen = set(await self.db.q.seen_feed_entries(url))
+
+        if not (row := await self.db.q.feed_state(url)):
+            return seen, True
+
+        self.validators[url] = (row.fs_etag, row.fs_modified)
+        return seen, False
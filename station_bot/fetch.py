@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import email.utils
+import hashlib
+import json
+import logging
+import math
+import re
+import time
+import typing as t
+from pathlib import Path
+
+import aiofiles
+import aiohttp
+
+# Only these headers are kept with cached responses.
+KEPT_HEADERS: t.Final = (
+    "Cache-Control",
+    "Content-Type",
+    "Date",
+    "ETag",
+    "Expires",
+    "Last-Modified",
+)
+CACHE_CONTROL_PATTERN: t.Final = re.compile(r"([\w-]+)(?:=\"?([^\",]*)\"?)?")
+
+log = logging.getLogger(__name__)
+
+
+def create_session(
+    *, limit: int = 100, limit_per_host: int = 8, dns_ttl: int = 300
+) -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=limit, limit_per_host=limit_per_host, ttl_dns_cache=dns_ttl
+    )
+    return aiohttp.ClientSession(connector=connector, trust_env=True)
+
+
+def seconds(value: str | None) -> float | None:
+    # Servers send all sorts in these headers, and anything that isn't
+    # a plain number of seconds is treated as if it wasn't sent.
+    try:
+        result = float(value or "")
+    except ValueError:
+        return None
+
+    return result if 0 <= result < math.inf else None
+
+
+def parse_date(value: str | None) -> float | None:
+    try:
+        return email.utils.parsedate_to_datetime(value or "").timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness(headers: t.Mapping[str, str], default: float) -> float | None:
+    # Seconds the response can be served without asking the server
+    # again, or None if it mustn't be stored at all.
+    directives = {
+        k.lower(): v
+        for k, v in CACHE_CONTROL_PATTERN.findall(headers.get("Cache-Control", ""))
+    }
+
+    if "no-store" in directives:
+        return None
+
+    if "no-cache" in directives:
+        return 0.0
+
+    age = seconds(headers.get("Age")) or 0.0
+
+    if (max_age := seconds(directives.get("max-age"))) is not None:
+        return max(max_age - age, 0.0)
+
+    if "Expires" in headers:
+        if (when := parse_date(headers["Expires"])) is None:
+            # Invalid dates mean the response has already expired.
+            return 0.0
+
+        # Measured from the server's own clock where it gives one.
+        now = parse_date(headers.get("Date")) or time.time()
+        return max(when - now - age, 0.0)
+
+    return default
+
+
+class CachedResponse:
+    __slots__ = ("url", "status", "headers", "body", "expires")
+
+    def __init__(
+        self,
+        url: str,
+        status: int,
+        headers: dict[str, str],
+        body: bytes,
+        expires: float = 0.0,
+    ) -> None:
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        # Wall clock time, so it means the same thing on disk.
+        self.expires = expires
+
+    def __repr__(self) -> str:
+        return f"CachedResponse(url={self.url!r}, status={self.status})"
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires
+
+    @property
+    def validators(self) -> dict[str, str]:
+        headers = {}
+
+        if etag := self.headers.get("ETag"):
+            headers["If-None-Match"] = etag
+
+        if modified := self.headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = modified
+
+        return headers
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.body.decode(encoding)
+
+    def json(self) -> t.Any:
+        return json.loads(self.body)
+
+    def dump(self) -> bytes:
+        meta = {
+            "url": self.url,
+            "status": self.status,
+            "headers": self.headers,
+            "expires": self.expires,
+        }
+        return json.dumps(meta).encode() + b"\n" + self.body
+
+    @classmethod
+    def load(cls, data: bytes) -> CachedResponse:
+        meta, _, body = data.partition(b"\n")
+        return cls(body=body, **json.loads(meta))
+
+
+class Fetcher:
+    __slots__ = (
+        "session",
+        "entries",
+        "max_entries",
+        "max_bytes",
+        "size",
+        "default_ttl",
+        "disk_path",
+        "inflight",
+        "results",
+    )
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        *,
+        max_entries: int = 512,
+        max_bytes: int = 32 * 1024**2,
+        default_ttl: float = 0.0,
+        disk_path: Path | None = None,
+    ) -> None:
+        self.session = session
+        # Dicts keep insertion order, so moving an entry to the end on
+        # each hit leaves the least recently used one first.
+        self.entries: dict[str, CachedResponse] = {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.default_ttl = default_ttl
+        self.disk_path = disk_path
+        self.inflight: dict[str, asyncio.Task[CachedResponse]] = {}
+        # "hit", "disk", "revalidated", "coalesced", or "miss" -> count.
+        self.results: collections.Counter[str] = collections.Counter()
+
+        if disk_path:
+            disk_path.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def hit_rate(self) -> float:
+        total = sum(self.results.values())
+        return (total - self.results["miss"]) / total if total else 0.0
+
+    async def get(self, url: str, *, ttl: float | None = None) -> CachedResponse:
+        # ttl is only used when the server doesn't say how long the
+        # response stays fresh.
+        if (entry := self.entries.get(url)) and entry.fresh:
+            self.entries[url] = self.entries.pop(url)
+            self.results["hit"] += 1
+            return entry
+
+        # Concurrent requests for the same URL all wait on the first.
+        # Shielding it means one caller being cancelled doesn't cancel
+        # the request for the others.
+        if task := self.inflight.get(url):
+            self.results["coalesced"] += 1
+            return await asyncio.shield(task)
+
+        task = self.inflight[url] = asyncio.create_task(
+            self._fetch(url, entry, self.default_ttl if ttl is None else ttl)
+        )
+        task.add_done_callback(lambda _: self.inflight.pop(url, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(
+        self, url: str, entry: CachedResponse | None, ttl: float
+    ) -> CachedResponse:
+        if entry is None and self.disk_path:
+            if (entry := await self._read_disk(url)) and entry.fresh:
+                self.results["disk"] += 1
+                self._store(entry)
+                return entry
+
+        headers = entry.validators if entry else {}
+
+        async with self.session.get(url, headers=headers) as resp:
+            kept = {k: resp.headers[k] for k in KEPT_HEADERS if k in resp.headers}
+
+            if resp.status == 304 and entry:
+                self.results["revalidated"] += 1
+                # Headers sent with a 304 replace the stored ones, so a
+                # new Cache-Control or Date applies from now on. An old
+                # Date would make the response look younger than it is.
+                stored = {k: v for k, v in entry.headers.items() if k != "Date"}
+                kept = {**stored, **kept}
+                result = CachedResponse(url, entry.status, kept, entry.body)
+            else:
+                self.results["miss"] += 1
+                result = CachedResponse(url, resp.status, kept, await resp.read())
+
+            # Age describes this response only, so it's never stored.
+            age = {"Age": resp.headers["Age"]} if "Age" in resp.headers else {}
+            fresh_for = freshness({**result.headers, **age}, ttl)
+
+        if not result.ok or fresh_for is None:
+            self._discard(url)
+            return result
+
+        result.expires = time.time() + fresh_for
+
+        # A response that's stale straight away is still worth keeping
+        # if it can be revalidated for free next time.
+        if fresh_for or result.validators:
+            self._store(result)
+
+            if self.disk_path:
+                await self._write_disk(result)
+
+        return result
+
+    def _store(self, entry: CachedResponse) -> None:
+        self._discard(entry.url)
+
+        if len(entry.body) > self.max_bytes:
+            return
+
+        self.entries[entry.url] = entry
+        self.size += len(entry.body)
+
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            old = self.entries.pop(next(iter(self.entries)))
+            self.size -= len(old.body)
+
+    def _discard(self, url: str) -> None:
+        if old := self.entries.pop(url, None):
+            self.size -= len(old.body)
+
+    def invalidate(self, url: str) -> None:
+        self._discard(url)
+
+        if self.disk_path:
+            self._disk_file(url).unlink(missing_ok=True)
+
+    def _disk_file(self, url: str) -> Path:
+        assert self.disk_path is not None
+        return self.disk_path / hashlib.sha256(url.encode()).hexdigest()
+
+    async def _read_disk(self, url: str) -> CachedResponse | None:
+        try:
+            async with aiofiles.open(self._disk_file(url), "rb") as f:
+                entry = CachedResponse.load(await f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as ex:
+            log.warning(f"Discarding unreadable cache file for {url}: {ex}")
+            return None
+
+        return entry if entry.url == url else None
+
+    async def _write_disk(self, entry: CachedResponse) -> None:
+        # Written to a temporary file first so a crash never leaves a
+        # half-written entry behind.
+        path = self._disk_file(entry.url)
+        tmp = path.with_suffix(".tmp")
+
+        async with aiofiles.open(tmp, "wb") as f:
+            await f.write(entry.dump())
+
+        tmp.replace(path)
+
+    async def prune_disk(self) -> int:
+        if not self.disk_path:
+            return 0
+
+        def prune() -> int:
+            assert self.disk_path is not None
+            removed = 0
+
+            for path in self.disk_path.iterdir():
+                if path.suffix == ".tmp":
+                    continue
+
+                try:
+                    with path.open("rb") as f:
+                        meta = json.loads(f.readline())
+                except (OSError, ValueError):
+                    meta = {}
+
+                # Anything stale that can't be revalidated is dead
+                # weight.
+                stale = meta.get("expires", 0) < time.time()
+                headers = meta.get("headers", {})
+
+                if stale and not {"ETag", "Last-Modified"} & headers.keys():
+                    path.unlink(missing_ok=True)
+                    removed += 1
+
+            return removed
+
+        if removed := await asyncio.to_thread(prune):
+            log.info(f"Pruned {removed:,} HTTP cache files")
+
+        return removed
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import functools
+import logging
+import operator
+import types
+import typing as t
+
+import hikari
+import lightbulb
+from hikari.events.base_events import get_required_intents_for
+
+from station_bot.config import ConfigError
+
+# Commands look guilds, channels and roles up in the cache.
+BASE_INTENTS: t.Final = hikari.Intents.GUILDS
+PREFIX_INTENTS: t.Final = (
+    hikari.Intents.GUILD_MESSAGES
+    | hikari.Intents.DM_MESSAGES
+    | hikari.Intents.MESSAGE_CONTENT
+)
+
+log = logging.getLogger(__name__)
+
+
+def parse_intents(text: str) -> hikari.Intents:
+    try:
+        return functools.reduce(
+            operator.or_,
+            (hikari.Intents[name.strip().upper()] for name in text.split("|")),
+            hikari.Intents.NONE,
+        )
+    except KeyError as ex:
+        raise ConfigError(f"Unknown intent {ex}") from None
+
+
+def intents_for(event_type: type[hikari.Event]) -> hikari.Intents:
+    # Any one of the groups is enough for some of the events to arrive,
+    # but a listener on a base event expects all of them.
+    return functools.reduce(
+        operator.or_, get_required_intents_for(event_type), hikari.Intents.NONE
+    )
+
+
+def uses_prefix_commands(plugin: lightbulb.Plugin) -> bool:
+    return any(
+        issubclass(cmd_type, lightbulb.PrefixCommand)
+        for command in plugin._raw_commands
+        for cmd_type in getattr(command.callback, "__cmd_types__", ())
+    )
+
+
+def resolve_intents(
+    extensions: t.Iterable[types.ModuleType], override: str = ""
+) -> hikari.Intents:
+    if override:
+        intents = parse_intents(override)
+        log.info(f"Using configured intents: {intents}")
+        return intents
+
+    intents = BASE_INTENTS
+
+    for module in extensions:
+        # Extensions can declare intents their cache lookups rely on.
+        intents |= getattr(module, "INTENTS", hikari.Intents.NONE)
+
+        if not isinstance(plugin := getattr(module, "plugin", None), lightbulb.Plugin):
+            continue
+
+        for event_type in plugin._listeners:
+            intents |= intents_for(event_type)
+
+        if uses_prefix_commands(plugin):
+            intents |= PREFIX_INTENTS
+
+    log.info(f"Using intents: {intents}")
+
+    if dropped := hikari.Intents.ALL & ~intents:
+        log.info(f"No listeners need these intents, so they're off: {dropped}")
+
+    return intents
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import typing as t
+
+import hikari
+
+from station_bot.config import Config
+
+MESSAGE_LIMIT: t.Final = 2_000
+MAX_PENDING: t.Final = 1_000
+
+log = logging.getLogger(__name__)
+
+
+class LogSink:
+    __slots__ = (
+        "bot",
+        "interval",
+        "pending",
+        "size",
+        "messages",
+        "lines",
+        "coalesced",
+        "dropped",
+        "_wake",
+        "_closed",
+        "_task",
+    )
+
+    def __init__(self, bot: hikari.GatewayBot, *, interval: float = 5.0) -> None:
+        self.bot = bot
+        self.interval = interval
+        # (Channel, line) -> number of times it was queued since the
+        # last flush, where channel 0 is the bot's own log channel.
+        # Dicts keep insertion order, so lines go out in the order first
+        # seen.
+        self.pending: dict[tuple[int, str], int] = {}
+        self.size = 0
+        self.messages = 0
+        self.lines = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self._wake = asyncio.Event()
+        self._closed = False
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, line: str, channel_id: int = 0) -> None:
+        if (key := (channel_id, line)) in self.pending:
+            self.pending[key] += 1
+            self.coalesced += 1
+            return
+
+        if len(self.pending) >= MAX_PENDING:
+            self.dropped += 1
+            return
+
+        self.pending[key] = 1
+        self.size += len(line) + 1
+
+        if self.size >= MESSAGE_LIMIT:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self.pending:
+            return
+
+        # Lines queued while these are being sent start a fresh buffer.
+        pending, self.pending, self.size = self.pending, {}, 0
+        channels: dict[int, dict[str, int]] = {}
+
+        for (channel_id, line), count in pending.items():
+            channels.setdefault(channel_id, {})[line] = count
+
+        for channel_id, lines in channels.items():
+            for content in self._render(lines):
+                try:
+                    await self.bot.rest.create_message(
+                        channel_id or Config.LOG_CHANNEL_ID, content
+                    )
+                except hikari.HikariError:
+                    log.exception(f"Failed to send to log channel {channel_id}")
+                else:
+                    self.messages += 1
+
+        self.lines += len(pending)
+
+    @staticmethod
+    def _render(pending: dict[str, int]) -> list[str]:
+        chunks: list[str] = []
+        lines: list[str] = []
+        size = 0
+
+        for line, count in pending.items():
+            if count > 1:
+                line = f"{line} ×{count}"
+
+            if len(line) > MESSAGE_LIMIT:
+                line = f"{line[: MESSAGE_LIMIT - 1]}…"
+
+            if size + len(line) > MESSAGE_LIMIT:
+                chunks.append("\n".join(lines))
+                lines, size = [], 0
+
+            lines.append(line)
+            size += len(line) + 1
+
+        if lines:
+            chunks.append("\n".join(lines))
+
+        return chunks
+
+    async def close(self) -> None:
+        # Anything queued by shutdown handlers is sent before returning.
+        self._closed = True
+        self._wake.set()
+
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+        await self.flush()
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import functools
+import logging
+import time
+import typing as t
+
+import hikari
+import lightbulb
+from hikari.impl import buckets, event_manager_base, rate_limits, rest
+
+from station_bot.startup import lazy_import
+from station_bot.utils.stats import Histogram
+
+if t.TYPE_CHECKING:
+    from aiohttp import web
+
+    from station_bot.db import Database
+    from station_bot.fetch import Fetcher
+    from station_bot.scheduler import Scheduler
+else:
+    # Only needed when the endpoint is enabled.
+    web = lazy_import("aiohttp.web")
+
+LAG_INTERVAL: t.Final = 0.5
+# Acquires quicker than this didn't wait on a rate limit.
+RATE_LIMIT_BLOCKED: t.Final = 0.001
+PREFIX: t.Final = "station"
+
+log = logging.getLogger(__name__)
+
+
+class Metrics:
+    __slots__ = (
+        "loop_lag",
+        "events_received",
+        "events_handled",
+        "listeners",
+        "commands",
+        "command_errors",
+        "rest_calls",
+        "rest_latency",
+        "rate_limit_wait",
+        "db",
+        "scheduler",
+        "fetcher",
+        "_lag_task",
+        "_runner",
+    )
+
+    def __init__(self) -> None:
+        self.loop_lag = Histogram()
+        self.events_received: collections.Counter[str] = collections.Counter()
+        self.events_handled: collections.Counter[str] = collections.Counter()
+        self.listeners: dict[str, Histogram] = {}
+        self.commands: collections.Counter[str] = collections.Counter()
+        self.command_errors: collections.Counter[str] = collections.Counter()
+        self.rest_calls: collections.Counter[str] = collections.Counter()
+        self.rest_latency = Histogram()
+        self.rate_limit_wait = Histogram()
+        self.db: Database | None = None
+        self.scheduler: Scheduler | None = None
+        self.fetcher: Fetcher | None = None
+        self._lag_task: asyncio.Task[None] | None = None
+        self._runner: web.AppRunner | None = None
+
+    def install(self, bot: lightbulb.BotApp) -> None:
+        bot.subscribe(lightbulb.CommandInvocationEvent, self._on_command)
+        bot.subscribe(lightbulb.CommandErrorEvent, self._on_command_error)
+        _instrument_hikari()
+
+    def start(self) -> None:
+        if self._lag_task is None:
+            self._lag_task = asyncio.create_task(self._sample_lag())
+
+    async def close(self) -> None:
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _sample_lag(self) -> None:
+        # However long the loop overshoots a sleep is how long callbacks
+        # are waiting behind other work. This only relies on the loop's
+        # clock, so it works the same under uvloop.
+        loop = asyncio.get_running_loop()
+
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.loop_lag.observe(max(loop.time() - start - LAG_INTERVAL, 0.0))
+
+    async def _on_command(self, event: lightbulb.CommandInvocationEvent) -> None:
+        self.commands[event.command.qualname] += 1
+
+    async def _on_command_error(self, event: lightbulb.CommandErrorEvent) -> None:
+        command = event.context.command
+        self.command_errors[command.qualname if command else "unknown"] += 1
+
+    def listener(self, owner: str) -> Histogram:
+        if (histogram := self.listeners.get(owner)) is None:
+            histogram = self.listeners[owner] = Histogram()
+
+        return histogram
+
+    def time_listener(
+        self,
+        owner: str,
+        event_type: type[hikari.Event],
+        callback: t.Callable[[t.Any], t.Coroutine[t.Any, t.Any, None]],
+    ) -> t.Callable[[t.Any], t.Coroutine[t.Any, t.Any, None]]:
+        histogram = self.listener(owner)
+        name = event_type.__name__
+
+        @functools.wraps(callback)
+        async def timed(event: t.Any) -> None:
+            self.events_handled[name] += 1
+            start = time.perf_counter()
+
+            try:
+                await callback(event)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+        return timed
+
+    def render(self) -> str:
+        lines: list[str] = []
+        _histogram(lines, "event_loop_lag_seconds", "Event loop lag.", self.loop_lag)
+        _counter(
+            lines,
+            "gateway_events_received_total",
+            "Gateway dispatches received.",
+            "event",
+            self.events_received,
+        )
+        _counter(
+            lines,
+            "gateway_events_handled_total",
+            "Events delivered to a listener.",
+            "event",
+            self.events_handled,
+        )
+        _histogram(
+            lines,
+            "listener_seconds",
+            "Listener execution time.",
+            *self.listeners.items(),
+            label="plugin",
+        )
+        _counter(
+            lines,
+            "command_invocations_total",
+            "Command invocations.",
+            "command",
+            self.commands,
+        )
+        _counter(
+            lines,
+            "command_errors_total",
+            "Command errors.",
+            "command",
+            self.command_errors,
+        )
+        _counter(
+            lines, "rest_calls_total", "REST calls made.", "route", self.rest_calls
+        )
+        _histogram(
+            lines, "rest_seconds", "REST call time, waits included.", self.rest_latency
+        )
+        _histogram(
+            lines,
+            "rate_limit_wait_seconds",
+            "Time spent blocked on rate limits, per wait.",
+            self.rate_limit_wait,
+        )
+
+        if self.db:
+            _histogram(
+                lines, "db_query_seconds", "Database query latency.", self.db.latency
+            )
+
+        if self.scheduler:
+            jobs = self.scheduler.jobs.values()
+            _histogram(
+                lines,
+                "job_seconds",
+                "Scheduled job run time.",
+                *((job.id, job.durations) for job in jobs if job.trigger),
+                label="job",
+            )
+            _counter(
+                lines,
+                "job_failures_total",
+                "Scheduled job failures.",
+                "job",
+                {job.id: job.failures for job in jobs if job.trigger},
+            )
+
+        if self.fetcher:
+            _counter(
+                lines,
+                "http_cache_requests_total",
+                "HTTP fetches by how they were served.",
+                "result",
+                self.fetcher.results,
+            )
+
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host: str, port: int) -> None:
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(
+                text=self.render(), content_type="text/plain", charset="utf-8"
+            )
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        log.info(f"Serving metrics at http://{host}:{port}/metrics")
+
+
+def _labels(**labels: str) -> str:
+    if not labels:
+        return ""
+
+    escaped = (
+        k + '="' + v.replace("\\", "\\\\").replace('"', '\\"') + '"'
+        for k, v in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _counter(
+    lines: list[str],
+    name: str,
+    help: str,
+    label: str,
+    counts: t.Mapping[str, int],
+) -> None:
+    lines.append(f"# HELP {PREFIX}_{name} {help}")
+    lines.append(f"# TYPE {PREFIX}_{name} counter")
+
+    for key, count in sorted(counts.items()):
+        lines.append(f"{PREFIX}_{name}{_labels(**{label: key})} {count}")
+
+
+def _histogram(
+    lines: list[str],
+    name: str,
+    help: str,
+    *histograms: Histogram | tuple[str, Histogram],
+    label: str = "",
+) -> None:
+    lines.append(f"# HELP {PREFIX}_{name} {help}")
+    lines.append(f"# TYPE {PREFIX}_{name} histogram")
+
+    for entry in histograms:
+        key, histogram = entry if isinstance(entry, tuple) else ("", entry)
+        base = {label: key} if label else {}
+        seen = 0
+
+        for bound, count in zip(histogram.bounds, histogram.counts):
+            seen += count
+            le = _labels(**base, le=f"{bound:g}")
+            lines.append(f"{PREFIX}_{name}_bucket{le} {seen}")
+
+        le = _labels(**base, le="+Inf")
+        lines.append(f"{PREFIX}_{name}_bucket{le} {histogram.count}")
+        lines.append(f"{PREFIX}_{name}_sum{_labels(**base)} {histogram.total}")
+        lines.append(f"{PREFIX}_{name}_count{_labels(**base)} {histogram.count}")
+
+
+def _instrument_hikari() -> None:
+    # hikari's REST client and event manager are slotted, so calls are
+    # timed by wrapping the methods on their classes. Each wrapper is
+    # only applied once, and skipped if the method isn't there in this
+    # hikari version.
+    targets: tuple[tuple[type, str, t.Callable[[t.Any], t.Any]], ...] = (
+        (event_manager_base.EventManagerBase, "consume_raw_event", _consume_raw_event),
+        (rest.RESTClientImpl, "_request", _request),
+        (buckets.RESTBucket, "__aenter__", _timed_acquire),
+        (rate_limits.ManualRateLimiter, "acquire", _timed_acquire),
+    )
+
+    for cls, name, wrapper in targets:
+        if not (func := getattr(cls, name, None)):
+            log.warning(f"Cannot instrument {cls.__name__}.{name}")
+            continue
+
+        if getattr(func, "__wrapped__", None) is None:
+            setattr(cls, name, wrapper(func))
+
+
+def _consume_raw_event(func: t.Callable[..., None]) -> t.Callable[..., None]:
+    @functools.wraps(func)
+    def wrapper(self: t.Any, event_name: str, *args: t.Any, **kwargs: t.Any) -> None:
+        metrics.events_received[event_name] += 1
+        func(self, event_name, *args, **kwargs)
+
+    return wrapper
+
+
+def _request(
+    func: t.Callable[..., t.Awaitable[t.Any]]
+) -> t.Callable[..., t.Awaitable[t.Any]]:
+    @functools.wraps(func)
+    async def wrapper(self: t.Any, compiled_route: t.Any, **kwargs: t.Any) -> t.Any:
+        metrics.rest_calls[f"{compiled_route.method} {compiled_route.route}"] += 1
+        start = time.perf_counter()
+
+        try:
+            return await func(self, compiled_route, **kwargs)
+        finally:
+            metrics.rest_latency.observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+def _timed_acquire(
+    func: t.Callable[..., t.Awaitable[None]]
+) -> t.Callable[..., t.Awaitable[None]]:
+    @functools.wraps(func)
+    async def wrapper(self: t.Any) -> None:
+        start = time.perf_counter()
+
+        try:
+            await func(self)
+        finally:
+            # Almost every acquire returns straight away, and counting
+            # those would make this a count of REST calls.
+            if (took := time.perf_counter() - start) >= RATE_LIMIT_BLOCKED:
+                metrics.rate_limit_wait.observe(took)
+
+    return wrapper
+
+
+metrics = Metrics()
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import re
+import sqlite3
+import tempfile
+import time
+import typing as t
+from pathlib import Path
+
+import aiosqlite
+
+MIGRATION_PATTERN: t.Final = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+log = logging.getLogger(__name__)
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration:
+    __slots__ = ("version", "name", "path")
+
+    def __init__(self, version: int, name: str, path: Path) -> None:
+        self.version = version
+        self.name = name
+        self.path = path
+
+    def __repr__(self) -> str:
+        return f"Migration(version={self.version}, name={self.name!r})"
+
+    @property
+    def statements(self) -> list[str]:
+        statements: list[str] = []
+        lines: list[str] = []
+
+        for line in self.path.read_text(encoding="utf-8").splitlines():
+            lines.append(line)
+
+            if sqlite3.complete_statement(text := "\n".join(lines)):
+                statements.append(text.strip())
+                lines = []
+
+        if text := "\n".join(lines).strip():
+            # The last statement doesn't need a trailing semicolon.
+            statements.append(text)
+
+        return statements
+
+
+class Migrator:
+    __slots__ = ("path", "migrations")
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.migrations = self.discover()
+
+    @property
+    def latest(self) -> int:
+        return self.migrations[-1].version if self.migrations else 0
+
+    def discover(self) -> list[Migration]:
+        migrations = []
+
+        for file in self.path.glob("*.sql"):
+            if not (match := MIGRATION_PATTERN.match(file.name)):
+                raise MigrationError(f"{file.name} is not a valid migration name")
+
+            migrations.append(Migration(int(match[1]), match[2], file))
+
+        migrations.sort(key=lambda m: m.version)
+
+        for i, migration in enumerate(migrations, start=1):
+            if migration.version != i:
+                raise MigrationError(
+                    f"Expected migration {i}, found {migration.path.name}"
+                )
+
+        return migrations
+
+    async def version(self, cxn: aiosqlite.Connection) -> int:
+        async with cxn.execute("PRAGMA user_version") as cur:
+            row = await cur.fetchone()
+
+        return int(row[0]) if row else 0
+
+    async def pending(self, cxn: aiosqlite.Connection) -> list[Migration]:
+        if (current := await self.version(cxn)) > self.latest:
+            raise MigrationError(
+                f"Database is at version {current}, "
+                f"but the latest migration is {self.latest}"
+            )
+
+        return self.migrations[current:]
+
+    async def apply(self, cxn: aiosqlite.Connection) -> list[tuple[Migration, float]]:
+        if not (pending := await self.pending(cxn)):
+            log.info(f"Database schema is up to date (version {self.latest})")
+            return []
+
+        applied = []
+
+        for migration in pending:
+            start = time.perf_counter()
+
+            try:
+                # Taking the write lock before checking the version
+                # means shard processes starting together apply each
+                # migration once. user_version is part of the database
+                # header, so a failed migration leaves it untouched.
+                await cxn.execute("BEGIN IMMEDIATE")
+
+                if await self.version(cxn) >= migration.version:
+                    await cxn.rollback()
+                    log.info(f"Migration {migration.path.name} was already applied")
+                    continue
+
+                for statement in migration.statements:
+                    await cxn.execute(statement)
+
+                await cxn.execute(f"PRAGMA user_version = {migration.version}")
+                await cxn.commit()
+            except sqlite3.Error as ex:
+                await cxn.rollback()
+                raise MigrationError(
+                    f"Migration {migration.path.name} failed: {ex}"
+                ) from ex
+
+            applied.append((migration, took := time.perf_counter() - start))
+            log.info(f"Applied migration {migration.path.name} in {took:,.3f}s")
+
+        return applied
+
+    async def dry_run(self, db_path: Path) -> list[tuple[Migration, float]]:
+        with tempfile.TemporaryDirectory() as tmp:
+            copy = Path(tmp) / db_path.name
+            await asyncio.to_thread(_copy_database, db_path, copy)
+
+            async with aiosqlite.connect(copy) as cxn:
+                return await self.apply(cxn)
+
+
+def _copy_database(source: Path, dest: Path) -> None:
+    with sqlite3.connect(dest) as dst:
+        if source.exists():
+            with sqlite3.connect(f"{source.as_uri()}?mode=ro", uri=True) as src:
+                src.backup(dst)
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m station_bot.migrations")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="apply pending migrations to a copy of the database and time them",
+    )
+    args = parser.parse_args()
+
+    db_path = Path("./data/dynamic/database.sqlite3").resolve()
+    migrator = Migrator(Path("./data/static/migrations"))
+    current, pending = 0, migrator.migrations
+
+    if db_path.exists():
+        async with aiosqlite.connect(f"{db_path.as_uri()}?mode=ro", uri=True) as cxn:
+            current = await migrator.version(cxn)
+            pending = await migrator.pending(cxn)
+
+    print(f"Database is at version {current} of {migrator.latest}.")
+
+    if args.dry_run and pending:
+        for migration, took in await migrator.dry_run(db_path):
+            print(f"  {migration.path.name}: {took * 1_000:,.1f} ms")
+    else:
+        for migration in pending:
+            print(f"  {migration.path.name} is pending")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
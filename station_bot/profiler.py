@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import typing as t
+from pathlib import Path
+
+SAMPLE_INTERVAL: t.Final = 0.005
+SLOW_CALLBACK_DURATION: t.Final = 0.05
+TOP_ENTRIES: t.Final = 40
+
+log = logging.getLogger(__name__)
+
+
+class SlowCallbackHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__(logging.WARNING)
+        self.callbacks: list[tuple[float, str]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # asyncio and uvloop log slow steps as "Executing ... took".
+        # Anything else may be logged with a message that isn't a str.
+        if not isinstance(msg := record.msg, str) or not msg.startswith("Executing"):
+            return
+
+        if len(args := record.args or ()) == 2:
+            handle, took = t.cast(tuple[t.Any, t.Any], args)
+            self.callbacks.append((float(took), str(handle)))
+
+
+class Profiler:
+    __slots__ = (
+        "seconds",
+        "mode",
+        "memory",
+        "stacks",
+        "samples",
+        "profile",
+        "slow",
+        "allocations",
+        "took",
+    )
+
+    def __init__(
+        self, seconds: float, *, mode: str = "sample", memory: bool = False
+    ) -> None:
+        self.seconds = seconds
+        self.mode = mode
+        self.memory = memory
+        self.stacks: collections.Counter[str] = collections.Counter()
+        self.samples = 0
+        self.profile: cProfile.Profile | None = None
+        self.slow: list[tuple[float, str]] = []
+        self.allocations: list[tracemalloc.StatisticDiff] = []
+        self.took = 0.0
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        debug, duration = loop.get_debug(), loop.slow_callback_duration
+        handler = SlowCallbackHandler()
+        asyncio_log = logging.getLogger("asyncio")
+
+        # Slow steps are only reported in debug mode, which is also what
+        # makes it too expensive to leave on.
+        asyncio_log.addHandler(handler)
+        loop.slow_callback_duration = SLOW_CALLBACK_DURATION
+        loop.set_debug(True)
+
+        tracing = tracemalloc.is_tracing()
+
+        if self.memory and not tracing:
+            tracemalloc.start()
+
+        before = tracemalloc.take_snapshot() if self.memory else None
+        stop = threading.Event()
+        sampler = None
+        start = time.perf_counter()
+
+        try:
+            if self.mode == "deterministic":
+                self.profile = cProfile.Profile()
+                self.profile.enable()
+            else:
+                sampler = threading.Thread(
+                    target=self._sample,
+                    args=(threading.get_ident(), stop),
+                    name="profiler",
+                    daemon=True,
+                )
+                sampler.start()
+
+            await asyncio.sleep(self.seconds)
+        finally:
+            if self.profile:
+                self.profile.disable()
+
+            if sampler:
+                stop.set()
+                await asyncio.to_thread(sampler.join)
+
+            self.took = time.perf_counter() - start
+            loop.set_debug(debug)
+            loop.slow_callback_duration = duration
+            asyncio_log.removeHandler(handler)
+
+            if before:
+                after = tracemalloc.take_snapshot()
+                self.allocations = after.compare_to(before, "lineno")[:TOP_ENTRIES]
+
+                if not tracing:
+                    tracemalloc.stop()
+
+        self.slow = sorted(handler.callbacks, reverse=True)
+
+    def _sample(self, thread_id: int, stop: threading.Event) -> None:
+        while not stop.wait(SAMPLE_INTERVAL):
+            if not (frame := sys._current_frames().get(thread_id)):
+                continue
+
+            stack = []
+
+            while frame:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+    def report(self) -> str:
+        out = io.StringIO()
+        out.write(
+            f"Profiled for {self.took:,.3f}s ({self.mode} mode, "
+            f"slow callback threshold {SLOW_CALLBACK_DURATION * 1_000:,.0f} ms)\n\n"
+        )
+
+        if self.profile:
+            stats = pstats.Stats(self.profile, stream=out)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_ENTRIES)
+        else:
+            self._write_samples(out)
+
+        out.write(f"\nSlowest callbacks ({len(self.slow):,}):\n")
+
+        for took, handle in self.slow[:TOP_ENTRIES]:
+            out.write(f"{took * 1_000:>9,.1f} ms  {handle}\n")
+
+        if self.memory:
+            out.write("\nTop allocation changes:\n")
+
+            for diff in self.allocations:
+                out.write(f"{diff}\n")
+
+        return out.getvalue()
+
+    def _write_samples(self, out: io.StringIO) -> None:
+        own: collections.Counter[str] = collections.Counter()
+        total: collections.Counter[str] = collections.Counter()
+
+        for stack, n in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += n
+
+            for frame in set(frames):
+                total[frame] += n
+
+        out.write(f"{self.samples:,} samples every {SAMPLE_INTERVAL * 1_000:g} ms\n")
+
+        for title, counts in (("Own time", own), ("Total time", total)):
+            out.write(f"\n{title}:\n")
+
+            for frame, n in counts.most_common(TOP_ENTRIES):
+                out.write(f"{n / self.samples:>7.1%} {n:>7,}  {frame}\n")
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import functools
+import logging
+import re
+import typing as t
+from pathlib import Path
+
+if t.TYPE_CHECKING:
+    import aiosqlite
+
+    from station_bot.db import Database
+
+HEADER_PATTERN: t.Final = re.compile(r"^--\s*name:\s*(\w+)\s+(\w+)\s*$", re.MULTILINE)
+LITERAL_PATTERN: t.Final = re.compile(r"'(?:[^']|'')*'")
+
+# Query kinds and the Database methods they run through.
+KINDS: t.Final = {
+    "field": "try_fetch_field",
+    "record": "try_fetch_record",
+    "records": "fetch_records",
+    "column": "fetch_column",
+    "execute": "execute",
+    "many": "executemany",
+    "write": "write",
+}
+
+log = logging.getLogger(__name__)
+
+
+class QueryError(Exception):
+    pass
+
+
+class Query:
+    __slots__ = ("name", "kind", "sql", "path", "plan")
+
+    def __init__(self, name: str, kind: str, sql: str, path: Path) -> None:
+        self.name = name
+        self.kind = kind
+        self.sql = sql
+        self.path = path
+        self.plan: list[str] = []
+
+    def __repr__(self) -> str:
+        return f"Query(name={self.name!r}, kind={self.kind!r})"
+
+    @property
+    def param_count(self) -> int:
+        return LITERAL_PATTERN.sub("", self.sql).count("?")
+
+    @property
+    def scans(self) -> list[str]:
+        return [
+            step
+            for step in self.plan
+            # Scans of subqueries are over rows already produced by an
+            # inner step, so only table scans are reported.
+            if (
+                step.startswith("SCAN ")
+                and " INDEX " not in step
+                and not step.startswith("SCAN (")
+            )
+            or step.startswith("USE TEMP B-TREE")
+        ]
+
+
+class QueryRegistry:
+    __slots__ = ("db", "queries", "_calls")
+
+    def __init__(self, db: Database) -> None:
+        self.db = db
+        self.queries: dict[str, Query] = {}
+        self._calls: dict[str, t.Callable[..., t.Awaitable[t.Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+    def __getattr__(self, name: str) -> t.Callable[..., t.Awaitable[t.Any]]:
+        try:
+            return self._calls[name]
+        except KeyError:
+            raise AttributeError(f"{name} is not a registered query.") from None
+
+    def load(self, path: Path) -> None:
+        for file in sorted(path.glob("*.sql")):
+            self.parse(file.read_text(encoding="utf-8"), file)
+
+        log.info(f"Loaded {len(self.queries)} named queries from {path}")
+
+    def parse(self, text: str, path: Path) -> None:
+        headers = list(HEADER_PATTERN.finditer(text))
+
+        for i, match in enumerate(headers):
+            name, kind = match.groups()
+            end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+            sql = text[match.end() : end].strip().rstrip(";")
+
+            if kind not in KINDS:
+                raise QueryError(f"{path.name}: query '{name}' has unknown kind {kind}")
+
+            if name in self.queries:
+                raise QueryError(f"{path.name}: query '{name}' is already defined")
+
+            self.queries[name] = Query(name, kind, sql, path)
+            self._calls[name] = functools.partial(getattr(self.db, KINDS[kind]), sql)
+
+    async def validate(self, cxn: aiosqlite.Connection) -> None:
+        # Preparing each statement through EXPLAIN checks it against the
+        # live schema without running it, so a bad query fails at boot.
+        for query in self.queries.values():
+            params = (None,) * query.param_count
+
+            try:
+                await cxn.execute(f"EXPLAIN {query.sql}", params)
+                cur = await cxn.execute(f"EXPLAIN QUERY PLAN {query.sql}", params)
+            except Exception as ex:
+                raise QueryError(
+                    f"{query.path.name}: query '{query.name}' is invalid: {ex}"
+                ) from ex
+
+            rows = t.cast(t.Iterable[t.Any], await cur.fetchall())
+            query.plan = [row.detail for row in rows]
+
+            if query.plan:
+                log.info(f"Query plan for '{query.name}': {'; '.join(query.plan)}")
+
+            if scans := query.scans:
+                log.warning(
+                    f"Query '{query.name}' does not fully use an index: "
+                    + "; ".join(scans)
+                )
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import logging
+import typing as t
+
+from station_bot.config import Config
+
+if t.TYPE_CHECKING:
+    from station_bot.db import Database, Row
+
+# Matches any emoji on a message without a reaction role of its own.
+ANY_EMOJI: t.Final = "*"
+# Clients don't always agree on whether emoji carry this selector.
+VARIATION_SELECTOR: t.Final = "\ufe0f"
+CONFIG_IMPORT: t.Final = "reaction_roles.config"
+
+log = logging.getLogger(__name__)
+
+
+def emoji_key(emoji_id: int | None, emoji_name: str | None) -> str:
+    if emoji_id:
+        return str(emoji_id)
+
+    return (emoji_name or "").replace(VARIATION_SELECTOR, "")
+
+
+class ReactionRoles:
+    __slots__ = ("db", "index", "guilds", "checked", "matched")
+
+    def __init__(self, db: Database) -> None:
+        self.db = db
+        # Message ID -> emoji key -> role ID. Almost every reaction is
+        # on a message without reaction roles, so it's turned away by
+        # the first lookup however many messages are registered.
+        self.index: dict[int, dict[str, int]] = {}
+        # Guild ID -> message IDs, so a guild's entries can be dropped
+        # when this process stops owning it.
+        self.guilds: dict[int, set[int]] = {}
+        self.checked = 0
+        self.matched = 0
+
+    def lookup(
+        self, message_id: int, emoji_id: int | None, emoji_name: str | None
+    ) -> int | None:
+        self.checked += 1
+
+        if (emojis := self.index.get(message_id)) is None:
+            return None
+
+        role_id = emojis.get(emoji_key(emoji_id, emoji_name)) or emojis.get(ANY_EMOJI)
+
+        if role_id:
+            self.matched += 1
+
+        return role_id
+
+    async def load_guild(self, guild_id: int) -> None:
+        # Reaction events and the commands that change entries both come
+        # through the shard that owns the guild, so each process only
+        # indexes its own guilds and never needs to resync.
+        self.unload_guild(guild_id)
+
+        for row in await self.db.q.guild_reaction_roles(guild_id):
+            self._index(guild_id, row.rr_message_id, row.rr_emoji, row.rr_role_id)
+
+        if guild_id == Config.GUILD_ID:
+            await self._import_config(guild_id)
+
+    def unload_guild(self, guild_id: int) -> None:
+        for message_id in self.guilds.pop(guild_id, ()):
+            self.index.pop(message_id, None)
+
+    async def entries(self, guild_id: int) -> list[Row]:
+        return t.cast(list["Row"], await self.db.q.guild_reaction_roles(guild_id))
+
+    async def add(
+        self, guild_id: int, channel_id: int, message_id: int, emoji: str, role_id: int
+    ) -> None:
+        emoji = emoji.replace(VARIATION_SELECTOR, "")
+        await self.db.q.save_reaction_role(
+            message_id, emoji, guild_id, channel_id, role_id
+        )
+        self._index(guild_id, message_id, emoji, role_id)
+        log.info(
+            f"Added reaction role {role_id} for {emoji} on message {message_id} "
+            f"in guild {guild_id}"
+        )
+
+    async def remove(self, guild_id: int, message_id: int, emoji: str) -> bool:
+        emoji = emoji.replace(VARIATION_SELECTOR, "")
+        emojis = self.index.get(message_id, {})
+
+        if message_id not in self.guilds.get(guild_id, ()) or emoji not in emojis:
+            return False
+
+        await self.db.q.delete_reaction_role(message_id, emoji)
+        del emojis[emoji]
+
+        if not emojis:
+            del self.index[message_id]
+            self.guilds[guild_id].discard(message_id)
+
+        log.info(
+            f"Removed reaction role for {emoji} on message {message_id} "
+            f"in guild {guild_id}"
+        )
+        return True
+
+    def _index(self, guild_id: int, message_id: int, emoji: str, role_id: int) -> None:
+        self.index.setdefault(message_id, {})[emoji] = role_id
+        self.guilds.setdefault(guild_id, set()).add(message_id)
+
+    async def _import_config(self, guild_id: int) -> None:
+        message_id, role_id = Config.RULES_MESSAGE_ID, Config.PASSENGER_ROLE_ID
+
+        # Only imported once, so removing the entry with a command isn't
+        # undone on the next start.
+        if not message_id or not role_id or await self.db.q.imported(CONFIG_IMPORT):
+            return
+
+        if message_id not in self.index:
+            await self.add(guild_id, 0, message_id, ANY_EMOJI, role_id)
+            log.info(
+                "Imported RULES_MESSAGE_ID and PASSENGER_ROLE_ID as a reaction "
+                "role; they can now be removed from the config"
+            )
+
+        await self.db.q.mark_imported(CONFIG_IMPORT)
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import typing as t
+
+import hikari
+
+log = logging.getLogger(__name__)
+
+# (user ID, role ID) -> whether the role should be added (True) or
+# removed.
+PendingT = dict[tuple[int, int], bool]
+# (user ID, role ID) -> the state last sent to Discord, and when it was
+# sent.
+SentT = dict[tuple[int, int], tuple[bool, float]]
+
+# How long a sent change is trusted over the member cache, which only
+# catches up once the gateway echoes the change back.
+SENT_TTL: t.Final = 60.0
+
+
+class RoleQueue:
+    __slots__ = (
+        "bot",
+        "pending",
+        "sent",
+        "workers",
+        "dispatched",
+        "saved",
+        "failed",
+    )
+
+    def __init__(self, bot: hikari.GatewayBot) -> None:
+        self.bot = bot
+        # Role routes are rate limited per guild, so intents are grouped
+        # by guild and each guild gets its own sequential worker.
+        self.pending: dict[int, PendingT] = {}
+        self.sent: dict[int, SentT] = {}
+        self.workers: dict[int, asyncio.Task[None]] = {}
+        self.dispatched = 0
+        self.saved = 0
+        self.failed = 0
+
+    @property
+    def depth(self) -> int:
+        return sum(len(p) for p in self.pending.values())
+
+    def _cached_state(
+        self,
+        guild_id: int,
+        user_id: int,
+        role_id: int,
+        role_ids: t.Collection[int] | None = None,
+    ) -> bool | None:
+        if role_ids is None:
+            if not (member := self.bot.cache.get_member(guild_id, user_id)):
+                return None
+
+            role_ids = member.role_ids
+
+        return role_id in role_ids
+
+    def _state(
+        self,
+        guild_id: int,
+        user_id: int,
+        role_id: int,
+        role_ids: t.Collection[int] | None = None,
+    ) -> bool | None:
+        cached = self._cached_state(guild_id, user_id, role_id, role_ids)
+        sent = self.sent.get(guild_id, {})
+
+        if (entry := sent.get(key := (user_id, role_id))) is None:
+            return cached
+
+        state, when = entry
+
+        # Once the cache agrees the change has been echoed back, so the
+        # cache is up to date again.
+        if state is cached or time.monotonic() - when > SENT_TTL:
+            del sent[key]
+            return cached
+
+        return state
+
+    def has_role(
+        self,
+        guild_id: int,
+        user_id: int,
+        role_id: int,
+        role_ids: t.Collection[int] | None = None,
+    ) -> bool:
+        if (
+            state := self.pending.get(guild_id, {}).get((user_id, role_id))
+        ) is not None:
+            return state
+
+        return bool(self._state(guild_id, user_id, role_id, role_ids))
+
+    def add(
+        self,
+        guild_id: int,
+        user_id: int,
+        role_id: int,
+        role_ids: t.Collection[int] | None = None,
+    ) -> None:
+        self._request(guild_id, user_id, role_id, True, role_ids)
+
+    def remove(
+        self,
+        guild_id: int,
+        user_id: int,
+        role_id: int,
+        role_ids: t.Collection[int] | None = None,
+    ) -> None:
+        self._request(guild_id, user_id, role_id, False, role_ids)
+
+    def _request(
+        self,
+        guild_id: int,
+        user_id: int,
+        role_id: int,
+        add: bool,
+        role_ids: t.Collection[int] | None,
+    ) -> None:
+        pending = self.pending.setdefault(guild_id, {})
+        key = (user_id, role_id)
+
+        if (state := pending.get(key)) is not None:
+            if state is add:
+                self.saved += 1
+            else:
+                # An intent was only queued because it differed from the
+                # last known state, so the opposite intent cancels both
+                # out.
+                del pending[key]
+                self.saved += 2
+            return
+
+        if self._state(guild_id, user_id, role_id, role_ids) is add:
+            self.saved += 1
+            return
+
+        pending[key] = add
+
+        if guild_id not in self.workers:
+            self.workers[guild_id] = asyncio.create_task(self._work(guild_id))
+
+    async def _work(self, guild_id: int) -> None:
+        pending = self.pending[guild_id]
+        sent = self.sent.setdefault(guild_id, {})
+
+        try:
+            while pending:
+                key, add = next(iter(pending.items()))
+                del pending[key]
+                user_id, role_id = key
+
+                # The member may have changed since the intent was
+                # queued.
+                if self._state(guild_id, user_id, role_id) is add:
+                    self.saved += 1
+                    continue
+
+                # Intents arriving while this is in flight are compared
+                # against it rather than the cache.
+                sent[key] = (add, time.monotonic())
+
+                if not await self._dispatch(guild_id, user_id, role_id, add):
+                    sent.pop(key, None)
+        finally:
+            del self.workers[guild_id]
+            self._prune(guild_id)
+
+    def _prune(self, guild_id: int) -> None:
+        sent = self.sent.get(guild_id, {})
+        cutoff = time.monotonic() - SENT_TTL
+
+        for key in [k for k, (_, when) in sent.items() if when < cutoff]:
+            del sent[key]
+
+        if not sent:
+            self.sent.pop(guild_id, None)
+
+    async def _dispatch(
+        self, guild_id: int, user_id: int, role_id: int, add: bool
+    ) -> bool:
+        try:
+            if add:
+                await self.bot.rest.add_role_to_member(guild_id, user_id, role_id)
+            else:
+                await self.bot.rest.remove_role_from_member(guild_id, user_id, role_id)
+        except hikari.HikariError:
+            self.failed += 1
+            log.exception(
+                f"Failed to {'add' if add else 'remove'} role {role_id} "
+                f"for user {user_id} in guild {guild_id}"
+            )
+            return False
+
+        self.dispatched += 1
+        return True
+
+    async def close(self, timeout: float = 10.0) -> None:
+        if not (workers := list(self.workers.values())):
+            return
+
+        _, undone = await asyncio.wait(workers, timeout=timeout)
+
+        for task in undone:
+            task.cancel()
+
+        if undone:
+            log.warning(f"Dropped {self.depth} queued role changes on shutdown")
@@ -0,0 +1,402 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import datetime as dt
+import json
+import logging
+import random
+import time
+import typing as t
+
+from station_bot.utils import helpers
+from station_bot.utils.stats import Histogram
+
+if t.TYPE_CHECKING:
+    from station_bot.db import Database
+
+# (name, lowest value, highest value), most significant first. Days of
+# the week run from 0 (Monday) to 6.
+CRON_FIELDS: t.Final = (
+    ("month", 1, 12),
+    ("day", 1, 31),
+    ("day_of_week", 0, 6),
+    ("hour", 0, 23),
+    ("minute", 0, 59),
+    ("second", 0, 59),
+)
+# Enough to step through every day of a leap year cycle, which is
+# plenty for any schedule that can ever match.
+MAX_CRON_STEPS: t.Final = 366 * 4 * 3
+
+log = logging.getLogger(__name__)
+
+JobFuncT = t.Callable[[], t.Awaitable[t.Any]]
+HandlerT = t.Callable[[dict[str, t.Any]], t.Awaitable[t.Any]]
+
+
+class TriggerError(ValueError):
+    pass
+
+
+class Trigger(t.Protocol):
+    def next_after(self, after: dt.datetime) -> dt.datetime:
+        ...
+
+
+def _parse_field(name: str, spec: int | str, low: int, high: int) -> list[int]:
+    values: set[int] = set()
+
+    for part in str(spec).split(","):
+        part, _, step_text = part.strip().partition("/")
+        step = int(step_text) if step_text else 1
+
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(part)
+            end = high if step_text else start
+
+        if not low <= start <= end <= high or step < 1:
+            raise TriggerError(f"Invalid cron {name} {spec!r}")
+
+        values.update(range(start, end + 1, step))
+
+    return sorted(values)
+
+
+class CronTrigger:
+    __slots__ = ("fields",)
+
+    def __init__(self, **fields: int | str) -> None:
+        if unknown := set(fields) - {name for name, _, _ in CRON_FIELDS}:
+            raise TriggerError(f"Unknown cron fields: {', '.join(sorted(unknown))}")
+
+        # As with crontab and APScheduler, fields less significant than
+        # the most significant one given default to their lowest value,
+        # so CronTrigger(minute=30) fires once an hour, not every
+        # second of that minute.
+        given = [i for i, (name, _, _) in enumerate(CRON_FIELDS) if name in fields]
+        first = given[0] if given else len(CRON_FIELDS)
+        self.fields: dict[str, list[int]] = {}
+
+        for i, (name, low, high) in enumerate(CRON_FIELDS):
+            default: int | str = low if i > first and name != "day_of_week" else "*"
+            self.fields[name] = _parse_field(name, fields.get(name, default), low, high)
+
+    def __repr__(self) -> str:
+        return f"CronTrigger({self.fields})"
+
+    def next_after(self, after: dt.datetime) -> dt.datetime:
+        f = self.fields
+        when = after.replace(microsecond=0) + dt.timedelta(seconds=1)
+
+        for _ in range(MAX_CRON_STEPS):
+            if when.month not in f["month"]:
+                i = bisect.bisect_left(f["month"], when.month)
+                year = when.year + (i == len(f["month"]))
+                when = dt.datetime(year, f["month"][i % len(f["month"])], 1)
+                continue
+
+            if when.day not in f["day"] or when.weekday() not in f["day_of_week"]:
+                when = when.replace(hour=0, minute=0, second=0)
+                when += dt.timedelta(days=1)
+                continue
+
+            # The smaller fields roll over into the next unit up when
+            # there's no later value left in this one.
+            for name, step, size in (
+                ("hour", dt.timedelta(hours=1), 24),
+                ("minute", dt.timedelta(minutes=1), 60),
+                ("second", dt.timedelta(seconds=1), 60),
+            ):
+                current = getattr(when, name)
+
+                if current in f[name]:
+                    continue
+
+                i = bisect.bisect_left(f[name], current)
+                target = f[name][i] if i < len(f[name]) else size
+                when = dt.datetime.min + (when - dt.datetime.min) // step * step
+                when += (target - current) * step
+                break
+            else:
+                return when
+
+        raise TriggerError(f"{self!r} never fires")
+
+
+class IntervalTrigger:
+    __slots__ = ("interval", "start")
+
+    def __init__(
+        self,
+        *,
+        days: float = 0,
+        hours: float = 0,
+        minutes: float = 0,
+        seconds: float = 0,
+        start: dt.datetime | None = None,
+    ) -> None:
+        self.interval = dt.timedelta(
+            days=days, hours=hours, minutes=minutes, seconds=seconds
+        )
+
+        if self.interval <= dt.timedelta():
+            raise TriggerError("Intervals must be positive")
+
+        self.start = start or dt.datetime.utcnow()
+
+    def __repr__(self) -> str:
+        return f"IntervalTrigger({self.interval})"
+
+    def next_after(self, after: dt.datetime) -> dt.datetime:
+        # Runs stay on the grid laid out from the start time, however
+        # late the previous one was.
+        if after < self.start:
+            return self.start
+
+        return self.start + ((after - self.start) // self.interval + 1) * self.interval
+
+
+class Job:
+    __slots__ = (
+        "id",
+        "func",
+        "trigger",
+        "jitter",
+        "persist",
+        "next_run",
+        "durations",
+        "runs",
+        "failures",
+        "skipped",
+        "task",
+        "handle",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        func: JobFuncT,
+        trigger: Trigger | None,
+        *,
+        jitter: float = 0.0,
+        persist: bool = False,
+    ) -> None:
+        self.id = id
+        self.func = func
+        # One-off jobs have no trigger and are dropped after running.
+        self.trigger = trigger
+        self.jitter = jitter
+        self.persist = persist
+        self.next_run: dt.datetime | None = None
+        self.durations = Histogram()
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.task: asyncio.Task[None] | None = None
+        self.handle: asyncio.TimerHandle | None = None
+
+    def __repr__(self) -> str:
+        return f"Job(id={self.id!r}, trigger={self.trigger!r})"
+
+
+class Scheduler:
+    __slots__ = ("jobs", "handlers", "db", "running", "tasks")
+
+    def __init__(self) -> None:
+        self.jobs: dict[str, Job] = {}
+        # Persisted one-off jobs store a handler name rather than a
+        # function, so they can be picked back up after a restart.
+        self.handlers: dict[str, HandlerT] = {}
+        self.db: Database | None = None
+        self.running = False
+        # Background work started from sync code, kept so it isn't
+        # garbage collected and can be finished on close.
+        self.tasks: set[asyncio.Task[None]] = set()
+
+    def add_job(
+        self,
+        func: JobFuncT,
+        trigger: Trigger,
+        *,
+        id: str | None = None,
+        jitter: float = 0.0,
+        persist: bool = False,
+    ) -> Job:
+        job_id = id or str(getattr(func, "__qualname__", repr(func)))
+
+        if job_id in self.jobs:
+            raise ValueError(f"A job with ID {job_id!r} already exists")
+
+        job = self.jobs[job_id] = Job(
+            job_id, func, trigger, jitter=jitter, persist=persist
+        )
+
+        if self.running:
+            self._spawn(self._arm_recurring(job))
+
+        return job
+
+    def register(self, kind: str, handler: HandlerT) -> None:
+        self.handlers[kind] = handler
+
+    async def schedule(
+        self,
+        kind: str,
+        run_at: dt.datetime,
+        data: dict[str, t.Any] | None = None,
+        *,
+        id: str | None = None,
+    ) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"No handler is registered for {kind!r} jobs")
+
+        job_id = id or helpers.generate_id()
+        data = data or {}
+
+        if self.db:
+            await self.db.q.save_job(job_id, kind, run_at, json.dumps(data))
+
+        self._add_one_off(job_id, kind, run_at, data)
+        return job_id
+
+    async def cancel(self, job_id: str) -> bool:
+        if not (job := self.jobs.pop(job_id, None)):
+            return False
+
+        if job.handle:
+            job.handle.cancel()
+
+        if self.db and (job.persist or job.trigger is None):
+            await self.db.q.delete_job(job_id)
+
+        return True
+
+    async def start(self, db: Database | None = None) -> None:
+        self.db = db
+        self.running = True
+
+        for job in list(self.jobs.values()):
+            await self._arm_recurring(job)
+
+        if not db:
+            return
+
+        for row in await db.q.pending_jobs():
+            if row.job_kind not in self.handlers:
+                log.warning(f"No handler for {row.job_kind!r} job {row.job_id}")
+                continue
+
+            self._add_one_off(
+                row.job_id, row.job_kind, row.job_due, json.loads(row.job_data)
+            )
+
+    async def close(self) -> None:
+        self.running = False
+
+        for job in self.jobs.values():
+            if job.handle:
+                job.handle.cancel()
+
+        tasks = [job.task for job in self.jobs.values() if job.task]
+        tasks.extend(self.tasks)
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _spawn(self, coro: t.Coroutine[t.Any, t.Any, None]) -> None:
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def _add_one_off(
+        self, job_id: str, kind: str, run_at: dt.datetime, data: dict[str, t.Any]
+    ) -> None:
+        handler = self.handlers[kind]
+
+        async def run() -> None:
+            await handler(data)
+
+        job = self.jobs[job_id] = Job(job_id, run, None)
+        job.next_run = run_at
+
+        if self.running:
+            self._arm(job)
+
+    async def _arm_recurring(self, job: Job) -> None:
+        assert job.trigger is not None
+        now = dt.datetime.utcnow()
+        job.next_run = job.trigger.next_after(now)
+
+        if job.persist and self.db:
+            # Any number of runs missed while the bot was offline are
+            # made up with a single run straight away.
+            due = await self.db.q.job_due(job.id)
+
+            if isinstance(due, dt.datetime) and due <= now:
+                log.info(f"Job {job.id} missed a run at {due:%Y-%m-%d %H:%M:%S}")
+                job.next_run = now
+
+        self._arm(job)
+
+    def _arm(self, job: Job) -> None:
+        assert job.next_run is not None
+        delay = (job.next_run - dt.datetime.utcnow()).total_seconds()
+
+        if job.jitter:
+            delay += random.uniform(0, job.jitter)  # nosec: B311
+
+        job.handle = asyncio.get_running_loop().call_later(
+            max(delay, 0.0), self._fire, job
+        )
+
+        if job.persist and self.db and job.trigger:
+            self._spawn(self._save_due(job))
+
+    async def _save_due(self, job: Job) -> None:
+        assert self.db is not None
+        await self.db.q.save_job(job.id, None, job.next_run, None)
+
+    def _fire(self, job: Job) -> None:
+        job.handle = None
+
+        if not self.running:
+            return
+
+        if job.task and not job.task.done():
+            # Runs never overlap; the next one comes round as normal.
+            job.skipped += 1
+            log.warning(f"Skipped a run of job {job.id} as it's still running")
+        else:
+            job.task = asyncio.create_task(self._run(job))
+
+        if job.trigger:
+            # Scheduling from now, rather than from the run that was
+            # due, coalesces any runs missed while the loop was busy.
+            job.next_run = job.trigger.next_after(
+                max(dt.datetime.utcnow(), job.next_run or dt.datetime.min)
+            )
+            self._arm(job)
+
+    async def _run(self, job: Job) -> None:
+        start = time.perf_counter()
+
+        try:
+            await job.func()
+        except Exception:
+            job.failures += 1
+            log.exception(f"Job {job.id} failed")
+        finally:
+            job.runs += 1
+            job.durations.observe(time.perf_counter() - start)
+
+        if job.trigger is None:
+            self.jobs.pop(job.id, None)
+
+            if self.db:
+                await self.db.q.delete_job(job.id)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import dataclasses
+import logging
+import typing as t
+
+from station_bot.config import Config
+
+if t.TYPE_CHECKING:
+    from station_bot.db import Database
+
+log = logging.getLogger(__name__)
+
+
+class SettingsError(Exception):
+    pass
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class GuildSettings:
+    guild_id: int
+    log_channel_id: int = 0
+    member_count_channel_id: int = 0
+    role_assign_channel_id: int = 0
+    streams_role_id: int = 0
+    feed_channel_id: int = 0
+
+    @classmethod
+    def fields(cls) -> list[str]:
+        return [f.name for f in dataclasses.fields(cls) if f.name != "guild_id"]
+
+    @classmethod
+    def from_config(cls, guild_id: int) -> GuildSettings:
+        # Each setting is named after the config key it defaults to.
+        return cls(guild_id, **{name: Config[name.upper()] for name in cls.fields()})
+
+
+class SettingsStore:
+    __slots__ = ("db", "cache", "revision", "hits", "misses", "_generation")
+
+    def __init__(self, db: Database) -> None:
+        self.db = db
+        self.cache: dict[int, GuildSettings] = {}
+        # The highest revision seen, so changes made by other processes
+        # can be picked up without rereading every guild.
+        self.revision = 0
+        self.hits = 0
+        self.misses = 0
+        # Bumped whenever cached settings are invalidated.
+        self._generation = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    async def start(self) -> None:
+        self.revision = t.cast(int, await self.db.q.settings_revision())
+
+    async def get(self, guild_id: int) -> GuildSettings:
+        if (settings := self.cache.get(guild_id)) is not None:
+            self.hits += 1
+            return settings
+
+        self.misses += 1
+        generation = self._generation
+
+        if row := await self.db.q.guild_settings(guild_id):
+            settings = GuildSettings(*row)
+        elif guild_id == Config.GUILD_ID:
+            settings = GuildSettings.from_config(guild_id)
+        else:
+            settings = GuildSettings(guild_id)
+
+        # Anything invalidated while this was loading may have made it
+        # stale, so it's only cached if nothing was.
+        if generation == self._generation:
+            self.cache[guild_id] = settings
+
+        return settings
+
+    async def set(self, guild_id: int, **changes: int) -> GuildSettings:
+        if unknown := changes.keys() - GuildSettings.fields():
+            raise SettingsError(f"Unknown settings: {', '.join(sorted(unknown))}")
+
+        settings = dataclasses.replace(await self.get(guild_id), **changes)
+        await self.db.q.save_guild_settings(*dataclasses.astuple(settings))
+        self._invalidate(guild_id)
+        log.info(f"Updated settings for guild {guild_id}: {changes}")
+        return settings
+
+    async def sync(self) -> None:
+        # Other processes share the database but not this cache, so any
+        # guild they've changed is dropped and reloaded on next use.
+        for row in await self.db.q.changed_guild_settings(self.revision):
+            self._invalidate(row.gs_guild_id)
+            self.revision = max(self.revision, row.gs_revision)
+
+    def _invalidate(self, guild_id: int) -> None:
+        self.cache.pop(guild_id, None)
+        self._generation += 1
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import builtins
+import contextlib
+import importlib.util
+import logging
+import sys
+import time
+import types
+import typing as t
+
+TOP_IMPORTS: t.Final = 10
+
+log = logging.getLogger(__name__)
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    # The module is registered straight away, but isn't executed until
+    # one of its attributes is first used.
+    if module := sys.modules.get(name):
+        return module
+
+    if not (spec := importlib.util.find_spec(name)) or not spec.loader:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class ImportTimer:
+    __slots__ = ("times", "_original", "_stack")
+
+    def __init__(self) -> None:
+        # Module name -> (time spent in the module itself, including
+        # children).
+        self.times: dict[str, tuple[float, float]] = {}
+        self._original: t.Callable[..., types.ModuleType] | None = None
+        self._stack: list[float] = []
+
+    def install(self) -> None:
+        if self._original is None:
+            self._original = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _import(
+        self,
+        name: str,
+        globals: t.Mapping[str, t.Any] | None = None,
+        locals: t.Mapping[str, t.Any] | None = None,
+        fromlist: t.Sequence[str] = (),
+        level: int = 0,
+    ) -> types.ModuleType:
+        assert self._original is not None
+
+        if level and globals:
+            key = importlib.util.resolve_name(
+                "." * level + name, globals.get("__package__")
+            )
+        else:
+            key = name
+
+        # Modules that are already loaded cost next to nothing.
+        if key in sys.modules:
+            return self._original(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        start = time.perf_counter()
+
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            took = time.perf_counter() - start
+            children = self._stack.pop()
+            self.times[key] = (took - children, took)
+
+            if self._stack:
+                self._stack[-1] += took
+
+    def slowest(self, n: int = TOP_IMPORTS) -> list[tuple[str, float, float]]:
+        return sorted(
+            ((k, own, total) for k, (own, total) in self.times.items()),
+            key=lambda i: i[1],
+            reverse=True,
+        )[:n]
+
+
+class Timeline:
+    __slots__ = ("start", "phases", "imports")
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        # (name, seconds since launch when the phase began, duration)
+        self.phases: list[tuple[str, float, float]] = []
+        self.imports = ImportTimer()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> t.Iterator[None]:
+        offset = self.elapsed
+
+        try:
+            yield
+        finally:
+            self.phases.append((name, offset, self.elapsed - offset))
+
+    def mark(self, name: str) -> None:
+        self.phases.append((name, self.elapsed, 0.0))
+
+    def offset(self, name: str) -> float | None:
+        return next((off for phase, off, _ in self.phases if phase == name), None)
+
+    def duration(self, prefix: str) -> float:
+        return sum(took for name, _, took in self.phases if name.startswith(prefix))
+
+    def brief(self) -> str:
+        if (ready := self.offset("Ready")) is None:
+            return "Still starting"
+
+        extensions = self.duration("Imported extension") + self.duration(
+            "Loaded extension"
+        )
+
+        return (
+            f"Ready in {ready:,.3f}s\n"
+            f"{self.offset('Imported') or 0:,.3f}s importing, "
+            f"{extensions:,.3f}s loading extensions, "
+            f"{self.duration('Database'):,.3f}s connecting to the database"
+        )
+
+    def ready(self) -> None:
+        self.mark("Ready")
+        self.imports.uninstall()
+        log.info(f"Startup timeline:\n{self.summary()}")
+
+    def summary(self) -> str:
+        lines = [
+            f"{offset:>8,.3f}s  {name}" + (f" ({took:,.3f}s)" if took else "")
+            for name, offset, took in sorted(self.phases, key=lambda p: p[1])
+        ]
+
+        if slowest := self.imports.slowest():
+            lines.append("Slowest imports (own / total):")
+            lines.extend(
+                f"{own:>8,.3f}s / {total:,.3f}s  {name}" for name, own, total in slowest
+            )
+
+        return "\n".join(lines)
+
+
+timeline = Timeline()
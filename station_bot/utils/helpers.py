@@ -1,6 +1,18 @@
-import hashlib
+from __future__ import annotations
+
 import random
+import secrets
 import time
+import typing as t
+
+# Crockford's base32 alphabet, which sorts in the same order as the
+# values.
+CROCKFORD_ALPHABET: t.Final = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+CROCKFORD_ALIASES: t.Final = str.maketrans("ILO", "110")
+RANDOM_BITS: t.Final = 80
+
+_last_time = 0
+_last_random = 0
 
 
 def choose_color() -> int:
@@ -31,4 +43,22 @@ def choose_color() -> int:
 
 
 def generate_id() -> str:
-    return hashlib.md5(f"{time.time()}".encode(), usedforsecurity=False).hexdigest()
+    # IDs are ULIDs: a millisecond timestamp followed by random bits, so
+    # they sort by creation time. Within the same millisecond the random
+    # part is incremented instead of redrawn, keeping IDs unique and
+    # ordered.
+    global _last_time, _last_random
+
+    now = time.time_ns() // 1_000_000
+
+    if now > _last_time:
+        _last_time, _last_random = now, secrets.randbits(RANDOM_BITS)
+    elif (_last_random := _last_random + 1) >> RANDOM_BITS:
+        _last_time, _last_random = _last_time + 1, 0
+
+    value = _last_time << RANDOM_BITS | _last_random
+    return "".join(CROCKFORD_ALPHABET[value >> s & 31] for s in range(125, -1, -5))
+
+
+def normalise_id(text: str) -> str:
+    return text.strip().upper().translate(CROCKFORD_ALIASES)
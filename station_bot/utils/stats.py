@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import bisect
+import typing as t
+
+# Bucket upper bounds in seconds, doubling from 0.1 ms to roughly 52 s.
+DEFAULT_BOUNDS: t.Final = tuple(0.0001 * 2**i for i in range(20))
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_BOUNDS) -> None:
+        self.bounds = bounds
+        # The final bucket catches anything above the last bound.
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+
+        target = p / 100 * self.count
+        seen = 0
+
+        for i, n in enumerate(self.counts):
+            seen += n
+
+            if seen >= target:
+                return (
+                    min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+                )
+
+        return self.max
+
+    def summary(self, scale: float = 1_000) -> str:
+        return ", ".join(
+            f"p{p} {self.percentile(p) * scale:,.1f}" for p in (50, 95, 99)
+        )